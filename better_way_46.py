@@ -3,9 +3,33 @@
 @property (getter), setter이 점점 많아지는 것 같을 때 선택을 고민해보자.
 디스크립터 프로토콜을 이용하면 비슷한 성질을 가진 애트리뷰트들에 대해서
 동일한 getter, setter 로직을 하나의 메서드 내부에 모아 표현할 수 있기 때문이다.
+
+점수 백만 개를 한 번에 넣을 때 `__set__` 을 백만 번 호출하면 느리고, 첫 번째 잘못된 값에서 멈춘다.
+`Grade.set_many` 와 `Exam.set_many` 는 한 열의 값을 NumPy 로 한 번에 검증하고,
+잘못된 행이 있으면 아무 값도 할당하지 않고 잘못된 행 전부를 `GradeValidationError` 로 알려준다.
 """
 
-from weakref import WeakKeyDictionary
+import time
+import random
+import numbers
+from itertools import repeat
+from weakref import WeakKeyDictionary, ref
+
+import numpy as np
+
+
+def update_weak_keys(mapping: WeakKeyDictionary, keys, values):
+    """ `mapping.update(zip(keys, values))` 와 같지만 훨씬 빠릅니다.
+    `WeakKeyDictionary.update` 는 파이썬 코드로 한 항목씩 `__setitem__` 을 호출한다.
+    `__setitem__` 이 하는 일(콜백을 단 약한 참조를 키로 `data` 에 저장)을 `map` 과 `dict.update` 로 한꺼번에 한다.
+    `data` 와 `_remove` 는 `WeakKeyDictionary` 의 내부 구현이므로, 둘 중 하나라도 없으면 공개 API 를 쓴다.
+    """
+    data = getattr(mapping, 'data', None)
+    remove = getattr(mapping, '_remove', None)
+    if not isinstance(data, dict) or remove is None:
+        mapping.update(zip(keys, values))
+        return
+    data.update(zip(map(ref, keys, repeat(remove)), values))
 
 
 class Grade:
@@ -31,12 +55,69 @@ class Grade:
             )
         self._values[instance] = value
 
+    @staticmethod
+    def invalid_rows(values) -> np.ndarray:
+        """ 0과 100 사이가 아닌 값들의 위치를 반환합니다.
+        `NaN` 과 실수가 아닌 값(`'90'`, `None` 등)도 잘못된 값이다.
+        """
+        array = np.asarray(values)
+        if array.dtype.kind in 'biuf':
+            # 모두 숫자라면 NumPy 로 한 번에 검사한다.
+            return np.flatnonzero(~((0 <= array) & (array <= 100)))
+        # 문자열이나 `None` 이 섞여 있으면 `float` 로 바꾸지 않고 하나씩 검사한다.
+        # `np.asarray(values, dtype=float)` 는 `'90'` 을 90.0 으로 바꿔 버린다.
+        return np.flatnonzero([
+            not (isinstance(value, numbers.Real) and 0 <= value <= 100)
+            for value in values
+        ])
+
+    def set_many(self, instances, values):
+        """ `instances[i]` 에 `values[i]` 를 할당합니다. 하나라도 잘못되면 아무것도 할당하지 않습니다.
+        """
+        if len(instances) != len(values):
+            raise ValueError('객체의 수와 값의 수가 다릅니다.')
+        rows = self.invalid_rows(values)
+        if len(rows):
+            raise GradeValidationError([(int(i), values[i]) for i in rows])
+        if isinstance(values, np.ndarray):
+            # NumPy 스칼라 대신 파이썬 숫자를 저장해서 `__set__` 으로 넣은 값과 똑같이 만든다.
+            values = values.tolist()
+        update_weak_keys(self._values, instances, values)
+
+
+class GradeValidationError(ValueError):
+    def __init__(self, errors: list):
+        # `errors`: (행 번호, 값) 의 목록. `Exam.set_many` 에서는 (애트리뷰트 이름, 행 번호, 값) 의 목록
+        self.errors = errors
+        super().__init__(
+            f'점수는 0과 100 사이입니다. 잘못된 값 {len(errors)}개: {errors[:5]}'
+            + (' ...' if len(errors) > 5 else '')
+        )
+
 
 class Exam:
     math_grade = Grade()
     writing_grade = Grade()
     science_grade = Grade()
 
+    @classmethod
+    def set_many(cls, instances, **columns):
+        """ `Exam.set_many(exams, math_grade=[...], writing_grade=[...])` 처럼 여러 객체에 열 단위로 점수를 할당합니다.
+        모든 열을 먼저 검증하고, 잘못된 값이 있으면 모든 열의 잘못된 값을 모아서 한 번에 알려준다.
+        """
+        errors = []
+        for name, values in columns.items():
+            if not isinstance(getattr(cls, name, None), Grade):
+                raise AttributeError(f'`{name}` 은 `Grade` 가 아닙니다.')
+            if len(instances) != len(values):
+                raise ValueError('객체의 수와 값의 수가 다릅니다.')
+            errors.extend(
+                (name, int(i), values[i]) for i in Grade.invalid_rows(values))
+        if errors:
+            raise GradeValidationError(errors)
+        for name, values in columns.items():
+            getattr(cls, name).set_many(instances, values)
+
 
 if __name__ == '__main__':
     first_exam = Exam()
@@ -57,3 +138,39 @@ if __name__ == '__main__':
 
     # Exam.__dict__['writing_grade'].__get__(exam, Exam)
     print(f'{second_exam.writing_grade} 맞음')
+
+    # 점수 백만 개를 한 번에 할당하기
+    n = 1_000_000
+    exams = [Exam() for _ in range(n)]
+    scores = [random.randint(0, 100) for _ in range(n)]
+
+    s = time.time()
+    for exam, score in zip(exams, scores):
+        exam.math_grade = score
+    e = time.time()
+    print(f'`__set__` {n}번: {e - s:.3f}초')
+
+    s = time.time()
+    Exam.set_many(exams, writing_grade=scores)
+    e = time.time()
+    print(f'`Exam.set_many` 한 번: {e - s:.3f}초')
+    assert all(exam.writing_grade == exam.math_grade for exam in exams)
+
+    # 잘못된 값이 있으면 아무것도 할당하지 않고, 잘못된 값 전부를 한 번에 알려준다.
+    bad_scores = list(scores)
+    bad_scores[10], bad_scores[20] = 101, -1
+    try:
+        Exam.set_many(exams, science_grade=bad_scores, math_grade=bad_scores)
+    except ValueError as e:
+        print(e)
+        print(f'`science_grade` 는 할당되지 않음: {exams[0].science_grade}')
+
+    # 숫자가 아닌 값도 잘못된 값으로 모아서 알려준다.
+    try:
+        Exam.set_many(exams[:4], math_grade=['90', 50.5, None, 'abc'])
+    except GradeValidationError as e:
+        print(e)
+
+# 검증은 NumPy 로 한 번에 끝나지만(백만 개에 수십 ms), 전체 시간은 생각만큼 줄지 않는다.
+# 대부분의 시간이 `WeakKeyDictionary` 에 넣을 약한 참조를 객체마다 만드는 데 쓰이기 때문이다.
+# 값을 객체 안에 저장하는 방법은 better way 50_3 의 슬롯 디스크립터를 참고.
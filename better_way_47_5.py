@@ -0,0 +1,244 @@
+""" better way 47_1 의 `LazyRecord.__getattr__` 은 없는 애트리뷰트에 대해 가짜 값을 만들어 `setattr` 로 저장해 둔다.
+이 패턴은 실제로는 저장소에서 필드를 필요할 때만 읽어 오는 데 쓴다.
+`BackedRecord` 는 없는 애트리뷰트에 접근하면 `backend` 에서 값을 가져온다.
+1. 필드들은 열 그룹(`column_groups`)으로 묶여 있다. 한 필드에 접근하면 같은 그룹의 나머지 필드도 한 번에 가져온다.
+   함께 쓰이는 필드를 같은 그룹에 두면 저장소에 접근하는 횟수가 줄어든다.
+2. 가져온 값은 `__dict__` 에 저장된다. 두 번째 접근부터는 `__getattr__` 이 호출되지 않는다. (better way 47_2 참고)
+3. `invalidate` 는 `__dict__` 에서 값을 지운다. 다음에 접근하면 `__getattr__` 이 다시 호출되어 저장소에서 새 값을 읽는다.
+4. 저장소는 `fetch(key, fields)` 만 구현하면 바꿔 끼울 수 있다.
+   `SQLiteBackend` 는 SQLite 파일에서, `MmapBackend` 는 열 그룹마다 고정 길이 레코드를 이어 붙인 파일을 `mmap` 으로 읽는다.
+"""
+
+import os
+import time
+import mmap
+import struct
+import sqlite3
+import tempfile
+
+from utils import colorprint
+
+
+class SQLiteBackend:
+    def __init__(self, path: str, table: str, key: str = 'id'):
+        self.connection = sqlite3.connect(path)
+        self.table = table
+        self.key = key
+        self.n_fetch = 0
+
+    def fetch(self, key, fields) -> dict:
+        self.n_fetch += 1
+        # 필드 이름은 클래스 정의에서 오므로 쿼리에 그대로 넣는다. 값은 반드시 `?` 로 넘긴다.
+        row = self.connection.execute(
+            f'SELECT {", ".join(fields)} FROM {self.table} '
+            f'WHERE {self.key} = ?',
+            (key,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return dict(zip(fields, row))
+
+    def close(self):
+        self.connection.close()
+
+
+class MmapBackend:
+    """ 열 그룹마다 `struct` 형식의 고정 길이 레코드 `n_rows` 개를 차례대로 저장한 파일을 읽습니다.
+    키는 행 번호다. 문자열(`s` 형식)은 UTF-8 로 저장하고, 남는 자리는 `\\0` 으로 채운다.
+    `struct` 는 긴 문자열을 말없이 잘라내므로, `write` 는 필드 길이를 넘는 문자열을 거부한다.
+    """
+    def __init__(self, path: str, groups: list[list[tuple[str, str]]], n_rows: int):
+        self.file = open(path, 'rb')
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.n_rows = n_rows
+        self.n_fetch = 0
+        self.groups = {} # 필드 이름 -> (필드 이름 목록, `struct.Struct`, 그룹의 시작 위치)
+        offset = 0
+        for group in groups:
+            names = [name for name, _ in group]
+            record = struct.Struct('<' + ''.join(fmt for _, fmt in group))
+            for name in names:
+                self.groups[name] = (names, record, offset)
+            offset += record.size * n_rows
+
+    @staticmethod
+    def write(path: str, groups: list[list[tuple[str, str]]], rows: list[dict]):
+        with open(path, 'wb') as f:
+            for group in groups:
+                record = struct.Struct('<' + ''.join(fmt for _, fmt in group))
+                for row in rows:
+                    values = []
+                    for name, fmt in group:
+                        value = row[name]
+                        if isinstance(value, str):
+                            value = value.encode()
+                            # 잘린 자리가 UTF-8 문자 중간이면 읽을 때 `UnicodeDecodeError` 가 난다.
+                            if len(value) > struct.calcsize(fmt):
+                                raise ValueError(
+                                    f'`{name}` 은 {struct.calcsize(fmt)}바이트를 넘을 수 없습니다. '
+                                    f'({row[name]!r}: {len(value)}바이트)')
+                        values.append(value)
+                    f.write(record.pack(*values))
+
+    def fetch(self, key, fields) -> dict:
+        """ `fields` 의 값만 반환합니다. 레코드의 `column_groups` 가 파일의 그룹과 달라도 된다.
+        필드들이 파일의 여러 그룹에 걸쳐 있으면 그룹마다 한 번씩 읽는다.
+        """
+        if not 0 <= key < self.n_rows:
+            raise KeyError(key)
+        self.n_fetch += 1
+        found = {}
+        for field in fields:
+            if field in found:
+                continue
+            names, record, offset = self.groups[field]
+            values = record.unpack_from(self.buffer, offset + key * record.size)
+            found.update(zip(names, values))
+        return {
+            field: value.rstrip(b'\0').decode() if isinstance(value, bytes) else value
+            for field in fields
+            for value in [found[field]]
+        }
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+
+class BackedRecord:
+    column_groups = ()
+
+    def __init_subclass__(cls):
+        super().__init_subclass__()
+        # 필드 이름 -> 그 필드가 속한 그룹
+        cls.field_groups = {
+            field: group
+            for group in cls.column_groups
+            for field in group
+        }
+
+    def __init__(self, backend, key) -> None:
+        self._backend = backend
+        self._key = key
+
+    def __getattr__(self, name):
+        group = type(self).field_groups.get(name)
+        if group is None:
+            raise AttributeError(f'`{name}`을 찾을 수 없음.')
+        try:
+            values = self._backend.fetch(self._key, group)
+        except KeyError as e:
+            # `getattr(record, name, default)` 나 `hasattr` 는 `AttributeError` 만 잡는다.
+            raise AttributeError(
+                f'`{name}`을 찾을 수 없음. (키 {self._key!r} 없음)') from e
+        # 같은 그룹의 다른 필드들도 함께 저장해 둔다.
+        self.__dict__.update(values)
+        return values[name]
+
+    def invalidate(self, *names):
+        """ 저장해 둔 필드 값을 지웁니다. 이름을 주지 않으면 모든 필드를 지운다.
+        """
+        for name in names or type(self).field_groups:
+            self.__dict__.pop(name, None)
+
+
+class StudentRecord(BackedRecord):
+    column_groups = (
+        ('name', 'email'),
+        ('score', 'rank'),
+    )
+
+
+class ReportRecord(BackedRecord):
+    # 저장소의 그룹과 다르게 묶어도 된다.
+    column_groups = (
+        ('name', 'score'),
+    )
+
+
+MMAP_GROUPS = [
+    [('name', '16s'), ('email', '32s')],
+    [('score', 'd'), ('rank', 'i')],
+]
+
+
+def fake_students(n: int) -> list[dict]:
+    return [
+        {
+            'id': i,
+            'name': f'student{i}',
+            'email': f'student{i}@school.ac.kr',
+            'score': (i * 37) % 101 + 0.5,
+            'rank': i + 1,
+        }
+        for i in range(n)
+    ]
+
+
+if __name__ == '__main__':
+    n = 10_000
+    students = fake_students(n)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'students.db')
+        connection = sqlite3.connect(db_path)
+        connection.execute(
+            'CREATE TABLE students '
+            '(id INTEGER PRIMARY KEY, name TEXT, email TEXT, score REAL, rank INTEGER)')
+        connection.executemany(
+            'INSERT INTO students VALUES (:id, :name, :email, :score, :rank)',
+            students)
+        connection.commit()
+
+        mmap_path = os.path.join(tmpdir, 'students.bin')
+        MmapBackend.write(mmap_path, MMAP_GROUPS, students)
+        try:
+            # 한글은 UTF-8 로 한 글자에 3바이트이므로 7글자(21바이트)는 `16s` 에 들어가지 않는다.
+            MmapBackend.write(
+                os.path.join(tmpdir, 'too_long.bin'), MMAP_GROUPS,
+                [dict(students[0], name='김철수김철수김')])
+        except ValueError as e:
+            print(f'저장 거부: {e}')
+
+        backends = {
+            'SQLite': SQLiteBackend(db_path, 'students'),
+            'mmap': MmapBackend(mmap_path, MMAP_GROUPS, n),
+        }
+        for name, backend in backends.items():
+            colorprint(f'\n{name} 저장소')
+            record = StudentRecord(backend, 7)
+            print('이전:', record.__dict__)
+            print('name:', record.name, f'(저장소 접근 {backend.n_fetch}회)')
+            print('email:', record.email, f'(저장소 접근 {backend.n_fetch}회)')
+            print('score:', record.score, f'(저장소 접근 {backend.n_fetch}회)')
+            print('이후:', record.__dict__)
+
+            if name == 'SQLite':
+                # 저장소의 값이 바뀌면 `invalidate` 로 지우고 다시 읽는다.
+                connection.execute('UPDATE students SET score = 100 WHERE id = 7')
+                connection.commit()
+                print('score (invalidate 이전):', record.score)
+                record.invalidate('score')
+                print('score (invalidate 이후):', record.score,
+                      f'(저장소 접근 {backend.n_fetch}회)')
+
+            report = ReportRecord(backend, 7)
+            print('다르게 묶은 레코드:', report.name, report.score)
+            print('없는 키:', getattr(StudentRecord(backend, -1), 'name', '기본값'))
+
+            # 모든 레코드의 이름과 이메일을 읽는다. 그룹 덕분에 레코드마다 한 번만 접근한다.
+            backend.n_fetch = 0
+            s = time.perf_counter()
+            for key in range(n):
+                record = StudentRecord(backend, key)
+                record.name, record.email
+            e = time.perf_counter()
+            print(f'레코드 {n}개의 name, email 읽기: {(e - s) * 1000:.1f}ms, '
+                  f'저장소 접근 {backend.n_fetch}회')
+            backend.close()
+
+        connection.close()
+
+# 그룹으로 묶은 덕분에 두 필드를 읽어도 레코드마다 저장소에 한 번만 접근한다.
+# 두 번째 접근부터는 `__dict__` 에서 바로 읽으므로 저장소의 값이 바뀌어도 모른다. 그럴 때 `invalidate` 를 호출한다.
+# SQLite 는 접근할 때마다 쿼리를 해석하고 실행하지만, `mmap` 은 파일의 정해진 위치를 `struct` 로 바로 읽으므로 더 빠르다.
@@ -0,0 +1,253 @@
+""" better way 47_3 의 `ValidatingRecord` 와 47_4 의 `DictionaryRecord` 는 `__getattribute__` 를 사용하므로
+`__dict__` 나 메서드를 포함한 모든 애트리뷰트 접근마다 파이썬 코드가 실행된다. 평범한 객체보다 몇 배에서 수십 배 느리다.
+`FastRecord` 는 값이 없는 필드에 접근하거나 검증할 필드에 값을 쓸 때만 파이썬 코드를 실행한다.
+1. 필드 값은 인스턴스 딕셔너리(`__dict__`)에 그대로 저장한다. `__dict__` 가 곧 백업 딕셔너리이므로 읽기 비용이 없다.
+2. 클래스를 만들 때(`__init_subclass__`) 필드마다 `MissingField` 디스크립터를 만들어 넣는다.
+   인스턴스 딕셔너리에 값이 없을 때만 호출되어 `missing` 훅을 실행한다.
+3. 검증할 필드가 있는 클래스에만 검증 함수를 찾아 호출하는 `__setattr__` 을 만들어 넣는다. 읽기에는 영향이 없다.
+   클래스가 `__setattr__` 을 직접 정의했다면 덮어쓰지 않는다. 만든 `__setattr__` 은 검증한 값을
+   MRO 에서 다음 `__setattr__` 에 넘기므로 부모 클래스가 정의한 `__setattr__` 도 그대로 호출된다.
+4. `__getattr__` 을 정의하기만 해도 CPython 에서는 모든 읽기가 조금 느려진다. (better way 47_1 참고)
+   그래서 선언하지 않은 이름은 기본 동작대로 `AttributeError` 를 일으키고,
+   아무 이름에나 값을 만들어 주는 `FastValidatingRecord` 만 `__getattr__` 을 정의한다.
+"""
+
+import io
+import timeit
+from contextlib import redirect_stdout
+
+from utils import colorprint
+from better_way_47_3 import ValidatingRecord
+from better_way_47_4 import DictionaryRecord
+
+
+class MissingField:
+    """ 값이 없는 필드에 접근했을 때만 `missing` 훅을 호출하는 디스크립터입니다.
+    `__set__` 이 없는(non-data) 디스크립터는 인스턴스 딕셔너리보다 우선순위가 낮다.
+    값이 `__dict__` 에 있으면 이 디스크립터는 호출되지 않는다.
+    """
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance, instance_type):
+        if instance is None:
+            return self
+        return instance.missing(self.name)
+
+
+class FastRecord:
+    fields = {} # 필드 이름 -> 검증 함수 (`None` 이면 검증하지 않음)
+
+    def __init_subclass__(cls):
+        super().__init_subclass__()
+        # 부모 클래스들의 필드를 합친다. 같은 이름이면 자식 클래스의 선언을 따른다.
+        cls.fields = {
+            name: validate
+            for base in reversed(cls.__mro__)
+            if 'fields' in vars(base)
+            for name, validate in vars(base)['fields'].items()
+        }
+        for name in cls.fields:
+            if name not in vars(cls):
+                setattr(cls, name, MissingField(name))
+        validators = {
+            name: validate
+            for name, validate in cls.fields.items()
+            if validate is not None
+        }
+        if '__setattr__' in vars(cls):
+            # 직접 정의한 `__setattr__` 은 그대로 둔다. 검증이 필요하면 `super().__setattr__` 을 호출한다.
+            return
+        if validators:
+            cls.__setattr__ = cls.make_setattr(validators)
+        elif getattr(cls.__setattr__, 'generated', False):
+            # 자식 클래스가 부모의 검증을 모두 없앴다면 부모가 만든 `__setattr__` 도 쓰지 않는다.
+            cls.__setattr__ = cls.next_setattr()
+
+    @classmethod
+    def next_setattr(cls):
+        """ MRO 에서 `cls` 다음에 오는 `__setattr__` 중 `make_setattr` 이 만들지 않은 첫 번째 것을 반환합니다.
+        `cls.fields` 는 부모 클래스들의 검증 함수를 이미 합친 것이므로, 부모가 만든 `__setattr__` 은 건너뛴다.
+        """
+        for base in cls.__mro__[1:]:
+            setter = vars(base).get('__setattr__')
+            if setter is not None and not getattr(setter, 'generated', False):
+                return setter
+        return object.__setattr__
+
+    @classmethod
+    def make_setattr(cls, validators: dict):
+        # `__setattr__` 을 정의해도 읽기 비용은 그대로다. 검증이 필요한 클래스에만 만들어 넣는다.
+        next_setattr = cls.next_setattr()
+
+        def __setattr__(self, name, value):
+            validate = validators.get(name)
+            if validate is not None:
+                value = validate(value)
+            next_setattr(self, name, value)
+
+        __setattr__.generated = True
+        return __setattr__
+
+    def __init__(self, **values) -> None:
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def missing(self, name):
+        raise AttributeError(f'`{name}`을 찾을 수 없음.')
+
+
+class FastDictionaryRecord(FastRecord):
+    fields = {'foo': None}
+
+    def __init__(self) -> None:
+        super().__init__(foo='존재하는 키 `foo`에 대한 값')
+
+
+class FastValidatingRecord(FastRecord):
+    """ 아무 이름에나 값을 만들어 주려면 결국 `__getattr__` 이 필요합니다.
+    CPython 은 `__getattr__` 이 있는 클래스의 모든 애트리뷰트 접근에 훅을 확인하는 비용을 조금 더한다.
+    그래도 `__getattribute__` 와 달리 찾은 애트리뷰트에 대해 파이썬 코드를 실행하지는 않는다.
+    """
+    def __init__(self) -> None:
+        super().__init__(exists=5)
+
+    def __getattr__(self, name):
+        return self.missing(name)
+
+    def missing(self, name):
+        if name.startswith('__'):
+            # `copy`, `pickle` 등이 찾는 특별 메서드까지 만들어내면 안 된다.
+            return super().missing(name)
+        value = f'정의되지 않은 `{name}`를 위한 값'
+        setattr(self, name, value)
+        return value
+
+
+def grade(value):
+    if not (0 <= value <= 100):
+        raise ValueError('점수는 0과 100 사이입니다.')
+    return value
+
+
+class GradeRecord(FastRecord):
+    fields = {'name': None, 'grade': grade}
+
+
+def nickname(value):
+    if not isinstance(value, str):
+        raise TypeError('별명은 문자열입니다.')
+    return value
+
+
+class NicknameRecord(GradeRecord):
+    # 부모 클래스의 필드(`name`, `grade`)와 검증도 그대로 물려받는다.
+    fields = {'nickname': nickname}
+
+
+class AuditedRecord(FastRecord):
+    """ `__setattr__` 을 직접 정의한 클래스입니다. 값을 쓸 때마다 이름을 기록한다.
+    """
+    def __setattr__(self, name, value):
+        if name != 'history':
+            self.__dict__.setdefault('history', []).append(name)
+        super().__setattr__(name, value)
+
+
+class AuditedGradeRecord(AuditedRecord):
+    # 검증한 값은 부모 클래스(`AuditedRecord`)의 `__setattr__` 을 거쳐 저장된다.
+    fields = {'name': None, 'grade': grade}
+
+
+class AuditedNameRecord(AuditedGradeRecord):
+    # 검증을 모두 없애도 부모 클래스가 직접 정의한 `__setattr__` 은 그대로 호출된다.
+    fields = {'grade': None}
+
+
+class PlainRecord:
+    def __init__(self) -> None:
+        self.foo = '존재하는 키 `foo`에 대한 값'
+
+
+def read_time(instance, expr: str, n=200_000) -> float:
+    """ `expr` 을 한 번 실행하는 데 걸리는 시간(나노초)을 반환합니다.
+    """
+    env = {'instance': instance}
+    elapsed = min(timeit.repeat(expr, globals=env, number=n, repeat=5))
+    return elapsed / n * 1e9
+
+
+if __name__ == '__main__':
+    data = FastDictionaryRecord()
+    print('foo:', data.foo)
+    try:
+        # 선언하지 않은 이름은 훅을 거치지 않고 파이썬의 기본 `AttributeError` 가 난다.
+        print('bar:', data.bar)
+    except AttributeError as e:
+        print(e)
+    # `DictionaryRecord` 와 달리 `__dict__` 와 메서드도 찾을 수 있다.
+    print('__dict__:', data.__dict__)
+
+    data = FastValidatingRecord()
+    colorprint('이전:', data.__dict__)
+    colorprint('첫번째 foo 호출:', data.foo)
+    colorprint('이후:', data.__dict__)
+
+    record = GradeRecord(name='ProtossDragoon', grade=82)
+    print(f'{record.name}: {record.grade}')
+    try:
+        record.grade = 101
+    except ValueError as e:
+        print(f'검증: {e}')
+    # 검증하는 필드도 `__dict__` 에 그대로 저장된다.
+    print('__dict__:', record.__dict__)
+    child = NicknameRecord(name='Protoss', nickname='Dragoon')
+    try:
+        child.grade = 1000
+    except ValueError as e:
+        print(f'자식 클래스도 검증: {e}')
+    try:
+        GradeRecord(name='empty').grade
+    except AttributeError as e:
+        print(f'값이 없는 필드: {e}')
+
+    audited = AuditedGradeRecord(name='Protoss', grade=90)
+    try:
+        audited.grade = -1
+    except ValueError as e:
+        print(f'직접 정의한 `__setattr__` 아래에서도 검증: {e}')
+    audited = AuditedNameRecord(name='Dragoon', grade=1000)
+    print('검증을 없앤 자식 클래스의 기록:', audited.history, audited.grade)
+
+    colorprint('\n애트리뷰트 읽기 비용 비교')
+    validating = ValidatingRecord()
+    with redirect_stdout(io.StringIO()):
+        validating.foo # 첫 번째 접근에서 값을 만들어 둔다.
+    fast_validating = FastValidatingRecord()
+    fast_validating.foo
+    cases = [
+        ('평범한 객체', PlainRecord(), 'instance.foo'),
+        ('DictionaryRecord', DictionaryRecord(), 'instance.foo'),
+        ('FastDictionaryRecord', FastDictionaryRecord(), 'instance.foo'),
+        ('ValidatingRecord', validating, 'instance.foo'),
+        ('FastValidatingRecord', fast_validating, 'instance.foo'),
+        ('ValidatingRecord 메서드', validating, 'instance.__init__'),
+        ('FastValidatingRecord 메서드', fast_validating, 'instance.__init__'),
+        ('GradeRecord 검증 필드', record, 'instance.grade'),
+    ]
+    # 측정 순서에 따른 잡음을 줄이기 위해 여러 번 번갈아 재고 가장 짧은 시간을 쓴다.
+    best = [float('inf')] * len(cases)
+    # `ValidatingRecord` 는 접근할 때마다 출력하므로 출력을 버리고 잰다.
+    with redirect_stdout(io.StringIO()):
+        for _ in range(3):
+            for i, (_, instance, expr) in enumerate(cases):
+                best[i] = min(best[i], read_time(instance, expr))
+    baseline = best[0]
+    for (name, _, _), elapsed in zip(cases, best):
+        print(f'{name:>26}: {elapsed:6.0f}ns ({elapsed / baseline:5.1f}배)')
+
+# `FastDictionaryRecord` 와 `GradeRecord` 는 값을 `__dict__` 에서 바로 읽으므로 `DictionaryRecord` 보다 열 배 이상 빠르다.
+# 평범한 객체보다는 십몇 ns 느리다. 클래스에 같은 이름의 디스크립터(`MissingField`)가 있으면
+# 인터프리터가 애트리뷰트 읽기를 가장 빠른 경로로 특수화하지 못하기 때문이다.
+# `FastValidatingRecord` 는 `__getattr__` 을 정의했으므로 메서드를 포함한 모든 읽기에 훅을 확인하는 비용이 더해진다.
+# `ValidatingRecord` 는 모든 접근마다 `print` 를 두 번 하므로 출력을 버려도 훨씬 느리다.
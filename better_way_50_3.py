@@ -0,0 +1,177 @@
+""" better way 46 의 `Grade` 는 값을 `WeakKeyDictionary` 에 저장한다. 값을 읽을 때마다 객체의 약한 참조를 만들고 해시를 찾는다.
+better way 50_2 의 `Field` 는 `_name` 이라는 애트리뷰트에 `getattr`/`setattr` 로 값을 저장하므로 객체마다 `__dict__` 가 필요하다.
+레코드가 수백만 개라면 객체마다 딸린 딕셔너리나 약한 참조가 메모리의 대부분을 차지한다.
+`__slots__` 를 사용하면 객체에 `__dict__` 가 없고, 애트리뷰트 값은 객체 안의 정해진 위치(슬롯)에 저장된다.
+1. `SlotMeta` 는 better way 50_1 의 `Meta` 처럼 클래스를 만들기 전에 `class_dict` 의 디스크립터들을 찾아서
+   `_name` 슬롯들로 이루어진 `__slots__` 를 만들어 넣는다.
+2. 클래스가 만들어진 뒤 `__set_name__` 이 호출되면, 디스크립터는 자기 슬롯의 멤버 디스크립터를 찾아 둔다.
+   멤버 디스크립터는 객체 안의 슬롯 위치(오프셋)를 알고 있으므로 값을 읽고 쓰는 일이 C 코드에서 바로 끝난다.
+   디스크립터는 `property` 를 상속받아, 읽기는 `attrgetter` 로, 검증이 없는 쓰기는 멤버 디스크립터로 바로 처리한다.
+3. `SlotGrade` 는 `Grade` 처럼 0과 100 사이인지 검증하고, `SlotField` 는 `Field` 처럼 값이 없으면 `''` 을 반환한다.
+"""
+
+import sys
+import timeit
+import tracemalloc
+from operator import attrgetter
+
+from utils import colorprint
+from better_way_46 import Exam
+from better_way_50_2 import Customer
+
+
+class SlotDescriptor(property):
+    """ `property` 를 상속받아, 값을 읽고 쓰는 일을 가능한 한 C 코드에 맡기는 디스크립터입니다.
+    `__get__` 을 파이썬으로 구현하면 읽을 때마다 파이썬 함수를 한 번 호출해야 해서
+    `getattr` 을 쓰는 `Field` 보다 오히려 느려진다.
+    """
+    default = None
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.name = None
+        self.internal_name = None
+        self.set_slot = None
+
+    def __set_name__(self, owner, name):
+        # `SlotMeta` 가 `internal_name` 으로 슬롯을 만들어 두었다.
+        self.name = name
+        self.internal_name = '_' + name
+        self.set_slot = owner.__dict__[self.internal_name].__set__
+        # `property` 의 getter, setter 는 만든 뒤에 바꿀 수 없으므로 `__init__` 을 다시 호출해서 정한다.
+        # `attrgetter` 는 C 로 구현되어 있어서 슬롯의 값을 바로 읽는다.
+        property.__init__(self, attrgetter(self.internal_name), self.setter())
+
+    def setter(self):
+        return self.set_slot
+
+
+class SlotGrade(SlotDescriptor):
+    default = 0
+
+    def setter(self):
+        set_slot = self.set_slot
+
+        def set_grade(instance, value):
+            if not (0 <= value <= 100):
+                raise ValueError(
+                    '점수는 0과 100 사이입니다.'
+                )
+            set_slot(instance, value)
+
+        return set_grade
+
+
+class SlotField(SlotDescriptor):
+    default = ''
+
+
+class SlotMeta(type):
+    def __new__(meta, name, bases, class_dict):
+        slots = list(class_dict.get('__slots__', ()))
+        for k, v in class_dict.items():
+            if isinstance(v, SlotDescriptor):
+                slots.append('_' + k)
+        class_dict['__slots__'] = tuple(slots)
+        klass = type.__new__(meta, name, bases, class_dict)
+        # 값을 할당하지 않은 슬롯을 읽으면 `AttributeError` 가 나므로, 객체를 만들 때 기본값을 채운다.
+        klass._slot_defaults = tuple(
+            (v.set_slot, v.default)
+            for base in reversed(klass.__mro__)
+            for v in vars(base).values()
+            if isinstance(v, SlotDescriptor)
+        )
+        return klass
+
+
+class SlotRecord(metaclass=SlotMeta):
+    def __init__(self):
+        for set_slot, default in self._slot_defaults:
+            set_slot(self, default)
+
+
+class SlotExam(SlotRecord):
+    math_grade = SlotGrade()
+    writing_grade = SlotGrade()
+    science_grade = SlotGrade()
+
+
+class SlotCustomer(SlotRecord):
+    email = SlotField()
+    first_name = SlotField()
+    last_name = SlotField()
+
+
+def memory_per_instance(klass, values: dict, n=100_000) -> float:
+    """ `klass` 객체를 `n` 개 만들어 `values` 를 할당했을 때, 객체 하나가 쓰는 메모리(바이트)를 반환합니다.
+    디스크립터가 따로 들고 있는 값(`Grade` 의 `WeakKeyDictionary`)도 포함한다.
+    """
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    instances = []
+    for _ in range(n):
+        instance = klass()
+        for k, v in values.items():
+            setattr(instance, k, v)
+        instances.append(instance)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # 객체들을 담은 리스트의 크기는 빼고 잰다.
+    return (after - before - sys.getsizeof(instances)) / n
+
+
+def access_time(instance, name: str, n=1_000_000) -> tuple[float, float]:
+    """ 애트리뷰트 한 번 읽기, 한 번 쓰기에 걸리는 시간(나노초)을 반환합니다.
+    """
+    value = getattr(instance, name)
+    env = {'instance': instance, 'value': value}
+    read = min(timeit.repeat(
+        f'instance.{name}', globals=env, number=n, repeat=5))
+    write = min(timeit.repeat(
+        f'instance.{name} = value', globals=env, number=n, repeat=5))
+    return read / n * 1e9, write / n * 1e9
+
+
+if __name__ == '__main__':
+    exam = SlotExam()
+    exam.writing_grade = 82
+    print(f'{exam.writing_grade} 맞음, 할당하지 않은 점수는 {exam.math_grade}')
+    try:
+        exam.math_grade = 101
+    except ValueError as e:
+        print(f'검증 유지: {e}')
+    try:
+        exam.__dict__
+    except AttributeError:
+        print('`SlotExam` 객체에는 `__dict__` 가 없다.')
+
+    grades = {'math_grade': 90, 'writing_grade': 82, 'science_grade': 75}
+    fields = {
+        'email': 'hello@world.com',
+        'first_name': 'Protoss',
+        'last_name': 'Dragoon',
+    }
+    pairs = [
+        ('Exam', Exam, SlotExam, grades, 'writing_grade'),
+        ('Customer', Customer, SlotCustomer, fields, 'email'),
+    ]
+    for name, klass, slot_klass, values, attr in pairs:
+        colorprint(f'\n`{name}` 와 `Slot{name}` 비교')
+        m1 = memory_per_instance(klass, values)
+        m2 = memory_per_instance(slot_klass, values)
+        print(f'객체당 메모리: {m1:6.0f}바이트 -> {m2:6.0f}바이트 '
+              f'({(1 - m2 / m1) * 100:.0f}% 절약)')
+
+        instance, slot_instance = klass(), slot_klass()
+        for k, v in values.items():
+            setattr(instance, k, v)
+            setattr(slot_instance, k, v)
+        r1, w1 = access_time(instance, attr)
+        r2, w2 = access_time(slot_instance, attr)
+        print(f'`{attr}` 읽기: {r1:5.0f}ns -> {r2:5.0f}ns ({r1 / r2:.1f}배 빠름)')
+        print(f'`{attr}` 쓰기: {w1:5.0f}ns -> {w2:5.0f}ns ({w1 / w2:.1f}배 빠름)')
+
+# 문자열 값 자체는 두 방식 모두 공유하므로 객체당 메모리에는 들어가지 않는다.
+# `Exam` 은 객체 하나마다 `WeakKeyDictionary` 에 약한 참조와 딕셔너리 항목이 세 개씩 생긴다.
+# `Customer` 는 객체마다 `__dict__` 가 생긴다.
+# 슬롯을 사용하면 둘 다 사라지고, 객체 자체의 크기만 남는다.
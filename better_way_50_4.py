@@ -0,0 +1,335 @@
+""" better way 50_2 의 `Customer` 객체는 하나하나가 `__dict__` 를 가진 파이썬 객체다.
+고객이 수천만 명이라면 객체와 딕셔너리만으로도 수 GB 의 메모리를 쓰고, 한 필드를 훑어보려 해도 모든 객체를 하나씩 방문해야 한다.
+열 지향(columnar) 저장소는 레코드를 행마다 저장하는 대신, 필드마다 하나의 배열에 모든 레코드의 값을 저장한다.
+1. `ColumnarRecord` 를 상속받은 클래스는 `__init_subclass__` 에서 `ColumnField` 디스크립터마다 열(`Column`)을 하나씩 만든다.
+2. 객체는 행 번호 하나만 가진 가벼운 핸들이다. `customer.email` 은 디스크립터가 `email` 열의 `index` 번째 값을 읽는 것이다.
+   `ColumnarMeta` 가 하위 클래스에 `__slots__ = ()` 를 넣어 주므로 핸들에는 `__dict__` 가 없다.
+   `__init_subclass__` 는 클래스가 만들어진 뒤에 호출되므로 `__slots__` 는 메타클래스에서 넣어야 한다. (better way 50_3 참고)
+3. `NumberField` 는 NumPy 배열에, `TextField` 는 문자열마다 번호를 붙이고(interning) 번호를 NumPy 배열에 저장한다.
+   같은 문자열이 여러 번 나와도 문자열 객체는 하나뿐이다. 값이 거의 겹치지 않는 열은 `intern=False` 로 참조만 저장한다.
+4. `column`, `mask`, `where` 는 객체를 만들지 않고 배열을 직접 훑는다.
+"""
+
+import time
+import random
+import tracemalloc
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from utils import colorprint
+from better_way_50_2 import Field, Customer
+
+
+class Column:
+    def __init__(self, dtype, default):
+        self.data = np.zeros(16, dtype=dtype)
+        self.default = default
+        self.size = 0
+
+    def reserve(self, n: int):
+        """ 값을 `n` 개 더 넣을 자리가 없으면 배열을 두 배씩 늘립니다. 늘어난 자리는 기본값으로 채운다.
+        """
+        capacity = len(self.data)
+        if self.size + n <= capacity:
+            return
+        while capacity < self.size + n:
+            capacity *= 2
+        data = np.empty(capacity, dtype=self.data.dtype)
+        data[:self.size] = self.data[:self.size]
+        data[self.size:] = self.encode(self.default)
+        self.data = data
+
+    def encode(self, value):
+        return value
+
+    def decode(self, value):
+        return value.item()
+
+    def append(self, value):
+        self.reserve(1)
+        self.data[self.size] = self.encode(value)
+        self.size += 1
+
+    def extend(self, values):
+        values = [self.encode(value) for value in values]
+        self.reserve(len(values))
+        self.data[self.size:self.size + len(values)] = values
+        self.size += len(values)
+
+    def get(self, index: int):
+        return self.decode(self.data[index])
+
+    def set(self, index: int, value):
+        self.data[index] = self.encode(value)
+
+    def values(self) -> np.ndarray:
+        # 복사하지 않은 뷰를 반환한다.
+        return self.data[:self.size]
+
+    def mask(self, value) -> np.ndarray:
+        return self.values() == self.encode(value)
+
+
+class ObjectColumn(Column):
+    """ 값마다 다른 문자열(이메일 등)은 번호를 붙여도 아낄 것이 없으므로 객체 참조를 그대로 저장합니다.
+    """
+    def __init__(self, default=''):
+        super().__init__(object, default)
+        self.data[:] = default
+
+    def decode(self, value):
+        return value
+
+
+class TextColumn(Column):
+    def __init__(self, default=''):
+        super().__init__(np.int32, default)
+        self.strings = []
+        self.codes = {}
+        self.encode(default) # 기본값이 0번이 되도록 먼저 등록한다.
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def decode(self, code) -> str:
+        return self.strings[code]
+
+    def mask(self, value: str) -> np.ndarray:
+        code = self.codes.get(value)
+        if code is None:
+            # 한 번도 저장된 적 없는 문자열은 번호를 새로 만들지 않는다.
+            return np.zeros(self.size, dtype=bool)
+        return self.values() == code
+
+    def mask_in(self, values) -> np.ndarray:
+        codes = [self.codes[v] for v in values if v in self.codes]
+        return np.isin(self.values(), codes)
+
+
+class ColumnField(Field, ABC):
+    """ 값을 객체가 아니라 클래스의 열에 저장하는 `Field` 입니다. """
+    @abstractmethod
+    def make_column(self) -> Column:
+        ...
+
+    def __get__(self, instance, instance_type):
+        if instance is None:
+            return self
+        return instance_type.columns[self.name].get(instance.index)
+
+    def __set__(self, instance, value):
+        type(instance).columns[self.name].set(instance.index, value)
+
+
+class NumberField(ColumnField):
+    def __init__(self, dtype=np.int64, default=0) -> None:
+        super().__init__()
+        self.dtype = dtype
+        self.default = default
+
+    def make_column(self) -> Column:
+        return Column(self.dtype, self.default)
+
+
+class TextField(ColumnField):
+    def __init__(self, default='', intern=True) -> None:
+        super().__init__()
+        self.default = default
+        self.intern = intern
+
+    def make_column(self) -> Column:
+        if self.intern:
+            return TextColumn(self.default)
+        return ObjectColumn(self.default)
+
+
+class ColumnarMeta(type):
+    def __new__(meta, name, bases, class_dict):
+        # 하위 클래스가 `__slots__` 를 선언하지 않으면 객체마다 `__dict__` 가 생긴다.
+        class_dict.setdefault('__slots__', ())
+        return type.__new__(meta, name, bases, class_dict)
+
+
+class ColumnarRecord(metaclass=ColumnarMeta):
+    __slots__ = ('index',)
+
+    def __init_subclass__(cls):
+        super().__init_subclass__()
+        # `__set_name__` 은 `__init_subclass__` 보다 먼저 호출되므로 필드의 이름이 이미 정해져 있다.
+        cls.columns = {
+            name: field.make_column()
+            for name in dir(cls)
+            if isinstance(field := getattr(cls, name), ColumnField)
+        }
+        cls.size = 0
+
+    def __init__(self, index: int):
+        # 열의 배열은 `size` 보다 크게 잡혀 있으므로, 범위를 벗어난 행 번호는 아직 추가하지 않은 칸을 읽게 된다.
+        if not 0 <= index < type(self).size:
+            raise IndexError(
+                f'행 번호 {index} 가 범위(0 ~ {type(self).size - 1})를 벗어났습니다.')
+        self.index = index
+
+    @classmethod
+    def check_names(cls, names):
+        unknown = [name for name in names if name not in cls.columns]
+        if unknown:
+            raise AttributeError(
+                f'`{cls.__name__}` 에는 {unknown} 필드가 없습니다.')
+
+    @classmethod
+    def append(cls, **values) -> 'ColumnarRecord':
+        cls.check_names(values)
+        for name, column in cls.columns.items():
+            column.append(values.get(name, column.default))
+        cls.size += 1
+        return cls(cls.size - 1)
+
+    @classmethod
+    def extend(cls, **columns):
+        """ 열 이름마다 값의 목록을 받아 여러 행을 한꺼번에 추가합니다. 모든 목록의 길이가 같아야 한다.
+        """
+        if not columns:
+            return
+        cls.check_names(columns)
+        # 열 하나라도 길이가 다르면 어떤 열도 늘리지 않는다. 열마다 길이가 달라지면 행이 어긋난다.
+        lengths = {name: len(values) for name, values in columns.items()}
+        n = next(iter(lengths.values()))
+        if any(length != n for length in lengths.values()):
+            raise ValueError(f'모든 열의 길이가 같아야 합니다. {lengths}')
+        for name, column in cls.columns.items():
+            values = columns.get(name)
+            if values is None:
+                values = [column.default] * n
+            column.extend(values)
+        cls.size += n
+
+    @classmethod
+    def column(cls, name: str) -> np.ndarray:
+        return cls.columns[name].values()
+
+    @classmethod
+    def mask(cls, **conditions) -> np.ndarray:
+        """ 모든 조건(`열 이름=값`)을 만족하는 행은 `True` 인 배열을 반환합니다.
+        """
+        result = np.ones(cls.size, dtype=bool)
+        for name, value in conditions.items():
+            result &= cls.columns[name].mask(value)
+        return result
+
+    @classmethod
+    def where(cls, mask: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(mask)
+
+    @classmethod
+    def rows(cls, indices):
+        for index in indices:
+            yield cls(int(index))
+
+    def __repr__(self):
+        values = ', '.join(
+            f'{name}={getattr(self, name)!r}' for name in self.columns)
+        return f'{type(self).__name__}({values})'
+
+
+class ColumnarCustomer(ColumnarRecord):
+    email = TextField(intern=False)
+    first_name = TextField()
+    last_name = TextField()
+    visits = NumberField(np.int32)
+
+
+def fake_customers(n: int, seed=0) -> dict:
+    rng = random.Random(seed)
+    first_names = [f'first{i}' for i in range(1000)]
+    last_names = ['Kim', 'Lee', 'Park', 'Choi', 'Jung'] + [f'last{i}' for i in range(995)]
+    domains = ['example.com', 'world.com', 'mail.net']
+    first = [rng.choice(first_names) for _ in range(n)]
+    last = [rng.choice(last_names) for _ in range(n)]
+    return {
+        'email': [f'{f}.{l}@{rng.choice(domains)}' for f, l in zip(first, last)],
+        'first_name': first,
+        'last_name': last,
+        'visits': [rng.randrange(100) for _ in range(n)],
+    }
+
+
+if __name__ == '__main__':
+    customer = ColumnarCustomer.append(email='hello@world.com')
+    print(f'값 할당 이전: {customer.first_name!r}')
+    customer.first_name = 'ProtossDragoon'
+    print(f'값 할당 이후: {customer!r}')
+    try:
+        customer.foo = 1
+    except AttributeError:
+        print('핸들에는 `__dict__` 가 없다.')
+    try:
+        ColumnarCustomer(5)
+    except IndexError as e:
+        print(e)
+    try:
+        ColumnarCustomer.append(emial='typo@world.com')
+    except AttributeError as e:
+        print(e)
+    try:
+        ColumnarCustomer.extend(email=['a@b.c', 'd@e.f'], visits=[1])
+    except ValueError as e:
+        print(e)
+    # 실패한 `extend` 는 어떤 열도 늘리지 않았다.
+    assert all(
+        len(column.values()) == ColumnarCustomer.size
+        for column in ColumnarCustomer.columns.values()
+    )
+
+    n = 1_000_000
+    # 문자열들은 미리 만들어 두고, 두 방식이 같은 문자열 객체를 가리키게 한다. 저장 방식의 차이만 잰다.
+    data = fake_customers(n)
+
+    colorprint(f'\n고객 {n}명 저장')
+    tracemalloc.start()
+    customers = []
+    for i in range(n):
+        c = Customer()
+        c.email = data['email'][i]
+        c.first_name = data['first_name'][i]
+        c.last_name = data['last_name'][i]
+        c.visits = data['visits'][i]
+        customers.append(c)
+    objects_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    ColumnarCustomer.extend(**data)
+    columnar_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'객체 {n}개: {objects_memory / 2**20:7.1f}MiB')
+    print(f'열 지향 저장소: {columnar_memory / 2**20:7.1f}MiB')
+
+    colorprint('\n성이 Kim 이고 방문 횟수가 50 이상인 고객 수')
+    s = time.perf_counter()
+    found1 = sum(
+        1 for c in customers if c.last_name == 'Kim' and c.visits >= 50)
+    t1 = time.perf_counter() - s
+
+    s = time.perf_counter()
+    mask = ColumnarCustomer.mask(last_name='Kim')
+    mask &= ColumnarCustomer.column('visits') >= 50
+    found2 = int(mask.sum())
+    t2 = time.perf_counter() - s
+    assert found1 == found2
+    print(f'객체 순회: {found1}명, {t1 * 1000:7.1f}ms')
+    print(f'열 훑기  : {found2}명, {t2 * 1000:7.1f}ms')
+
+    # 필요한 행만 핸들로 만들어 읽는다.
+    indices = ColumnarCustomer.where(mask)
+    for row in ColumnarCustomer.rows(indices[:3]):
+        print(row)
+
+# 객체는 행마다 객체와 `__dict__` 를 만든다. 열 지향 저장소는 이름처럼 같은 값이 반복되는 열에 행마다 4바이트,
+# 이메일 열에 행마다 8바이트(참조), 방문 횟수 열에 4바이트만 쓴다.
+# 조건 검색은 객체를 만들지 않고 NumPy 배열을 훑으므로 객체를 순회하는 것보다 수십 배 빠르다.
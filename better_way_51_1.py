@@ -45,6 +45,9 @@ trace_types = (
 
 
 class TraceMeta(type):
+    # 하위 메타클래스에서 다른 데코레이터로 바꿔 쓸 수 있다. (better way 51_3 참고)
+    decorator = staticmethod(trace_fn)
+
     def __new__(meta, name, bases, class_dict):
         klass = super().__new__(meta, name, bases, class_dict)
 
@@ -52,7 +55,7 @@ class TraceMeta(type):
             value = getattr(klass, key)
             if isinstance(value, trace_types):
                 # print(f'데코레이팅: (클래스: {klass.__name__}) `{key}`')
-                wrapped = trace_fn(value)
+                wrapped = meta.decorator(value)
                 setattr(klass, key, wrapped)
 
         return klass
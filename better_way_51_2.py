@@ -12,12 +12,12 @@ from better_way_51_1 import trace_fn, trace_types
 from utils import colorprint
 
 
-def trace(klass):
+def trace(klass, decorator=trace_fn):
     for key in dir(klass):
         value = getattr(klass, key)
         if isinstance(value, trace_types):
             # print(f'데코레이팅: (클래스: {klass.__name__}) `{key}`')
-            wrapped = trace_fn(value)
+            wrapped = decorator(value)
             setattr(klass, key, wrapped)
     return klass
 
@@ -0,0 +1,241 @@
+""" better way 51_1 의 `trace_fn` 은 호출될 때마다 `time.time()` 을 두 번 부르고 결과를 `print` 한다.
+호출이 잦은 클래스에 `TraceMeta` 나 `@trace` 를 적용하면 출력 비용 때문에 몇 배에서 몇십 배까지 느려진다.
+`sampling_trace_fn` 은 일부 호출만 골라서 시간을 잰다.
+1. `every` 번에 한 번씩만 시간을 잰다. 또는 `interval_ns` 를 주면, 마지막으로 잰 뒤 그 시간이 지난 다음 호출만 잰다.
+2. 시간은 `time.perf_counter_ns` 로 재고, 출력하지 않고 메서드별 히스토그램에 모은다.
+   히스토그램의 칸은 2의 거듭제곱을 네 칸으로 나눈 것이라 p50, p99 는 최대 25% 정도의 오차가 있는 근삿값이다.
+3. `report()` 를 호출하면 메서드별 호출 횟수, 잰 횟수, 추정 총 시간, p50, p99 를 출력하고 모은 값을 비운다.
+4. `every` 를 쓸 때 호출 횟수는 표본을 잴 때마다 `every` 씩 더한다. 마지막 `every` 번 미만의 호출은 세지 않는다.
+   호출 횟수는 `Lock` 없이 센다. 여러 스레드에서 호출하면 조금 틀릴 수 있지만, 표본을 고르는 데에는 문제가 없다.
+"""
+
+import io
+import sys
+import time
+from functools import wraps, partial
+from threading import Lock
+from contextlib import redirect_stdout
+
+from utils import colorprint
+from better_way_51_1 import TraceMeta, trace_fn
+from better_way_51_2 import trace
+
+
+class MethodStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.sampled = 0
+        self.total_ns = 0
+        self.histogram = {} # 칸의 하한(나노초) -> 잰 횟수
+
+    @staticmethod
+    def bucket(ns: int) -> int:
+        """ `ns` 가 들어갈 칸의 하한을 반환합니다. 상위 3비트만 남기고 나머지 비트를 버린다.
+        """
+        shift = max(ns.bit_length() - 3, 0)
+        return (ns >> shift) << shift
+
+    def add(self, ns: int):
+        self.sampled += 1
+        self.total_ns += ns
+        key = self.bucket(ns)
+        self.histogram[key] = self.histogram.get(key, 0) + 1
+
+    def percentile(self, q: float) -> int:
+        if not self.sampled:
+            return 0
+        rank = q * self.sampled
+        seen = 0
+        for key in sorted(self.histogram):
+            seen += self.histogram[key]
+            if seen >= rank:
+                return key
+        return key
+
+    def summary(self) -> dict:
+        mean = self.total_ns / self.sampled if self.sampled else 0
+        return {
+            'calls': self.calls,
+            'sampled': self.sampled,
+            'estimated_total_ns': int(mean * self.calls),
+            'p50_ns': self.percentile(0.5),
+            'p99_ns': self.percentile(0.99),
+        }
+
+
+class TraceStats:
+    def __init__(self):
+        self.lock = Lock()
+        self.methods = {}
+
+    def get(self, name: str) -> MethodStats:
+        with self.lock:
+            if name not in self.methods:
+                self.methods[name] = MethodStats(name)
+            return self.methods[name]
+
+    def add(self, method: MethodStats, ns: int):
+        # 잰 값은 드물게 들어오므로 `Lock` 을 잡아도 비용이 크지 않다.
+        with self.lock:
+            method.add(ns)
+
+    def report(self, file=None, reset=True) -> dict:
+        """ 모은 값을 출력하고 `{메서드 이름: 요약}` 으로 반환합니다. `reset` 이면 모은 값을 비운다.
+        """
+        file = sys.stdout if file is None else file
+        with self.lock:
+            result = {
+                name: method.summary()
+                for name, method in self.methods.items()
+                if method.calls
+            }
+            if reset:
+                for method in self.methods.values():
+                    method.calls = method.sampled = method.total_ns = 0
+                    method.histogram = {}
+
+        for name, s in sorted(result.items()):
+            print(f'{name:<40} 호출 {s["calls"]:>9}회, 측정 {s["sampled"]:>7}회, '
+                  f'추정 총 {s["estimated_total_ns"] / 1e6:9.3f}ms, '
+                  f'p50 {s["p50_ns"]:>7}ns, p99 {s["p99_ns"]:>7}ns', file=file)
+        return result
+
+
+STATS = TraceStats()
+
+
+def sampling_trace_fn(fn, every=100, interval_ns=None, stats=None):
+    # better way 51_1 과 달리 `tracing` 애트리뷰트를 실제로 붙인다.
+    # 자식 클래스에서 이미 감싼 부모의 메서드를 다시 감싸지 않으므로 같은 호출을 두 번 세지 않는다.
+    if hasattr(fn, 'tracing'):
+        return fn
+    stats = STATS if stats is None else stats
+    method = stats.get(getattr(fn, '__qualname__', fn.__name__))
+
+    if interval_ns is None:
+        countdown = every
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            # 호출 횟수를 애트리뷰트가 아닌 지역 변수로 세야 표본이 아닌 호출의 비용이 가장 적다.
+            nonlocal countdown
+            countdown -= 1
+            if countdown:
+                return fn(*args, **kwargs)
+            countdown = every
+            method.calls += every
+            s = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stats.add(method, time.perf_counter_ns() - s)
+    else:
+        next_sample_ns = 0
+
+        # 시간 간격으로 고르려면 호출마다 시계를 한 번은 읽어야 해서 `every` 보다 조금 느리다.
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            nonlocal next_sample_ns
+            method.calls += 1
+            s = time.perf_counter_ns()
+            if s < next_sample_ns:
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                e = time.perf_counter_ns()
+                next_sample_ns = e + interval_ns
+                stats.add(method, e - s)
+
+    wrapper.tracing = True
+    return wrapper
+
+
+def sampling(every=100, interval_ns=None, stats=None):
+    """ `trace(klass, decorator=sampling(...))` 처럼 설정을 바꿔 쓰기 위한 데코레이터를 반환합니다.
+    """
+    return partial(
+        sampling_trace_fn, every=every, interval_ns=interval_ns, stats=stats)
+
+
+def report(reset=True) -> dict:
+    return STATS.report(reset=reset)
+
+
+class SamplingTraceMeta(TraceMeta):
+    decorator = staticmethod(sampling_trace_fn)
+
+
+class SampledClass(metaclass=SamplingTraceMeta):
+    def run(self):
+        i = 0
+        for _ in range(100):
+            i += 1
+
+
+class SampledChildrenClass(SampledClass):
+    def child_run(self):
+        i = 0
+        for _ in range(1000):
+            i += 1
+
+
+class Work:
+    def run(self):
+        i = 0
+        for _ in range(1000):
+            i += 1
+
+
+def benchmark(klass, n=20_000) -> float:
+    """ `klass().run()` 을 `n` 번 호출하는 데 걸린 시간(초)을 반환합니다.
+    """
+    obj = klass()
+    run = obj.run
+    s = time.perf_counter()
+    for _ in range(n):
+        run()
+    return time.perf_counter() - s
+
+
+if __name__ == '__main__':
+    colorprint('메타클래스로 표본 추출 트레이스 적용')
+    obj = SampledChildrenClass()
+    for _ in range(10_000):
+        obj.run()
+        obj.child_run()
+    report()
+
+    colorprint('\n트레이스 방법에 따른 `run()` 호출 비용 비교')
+    # 모드마다 `Work` 를 상속받은 새 클래스를 만들어 데코레이터를 적용한다.
+    modes = {
+        '트레이스 없음': None,
+        '`trace_fn`': trace_fn,
+        'every=100': sampling(every=100, stats=TraceStats()),
+        'every=1000': sampling(every=1000, stats=TraceStats()),
+        'interval_ns=1ms': sampling(interval_ns=10**6, stats=TraceStats()),
+    }
+    klasses = {}
+    for name, decorator in modes.items():
+        klass = klasses[name] = type('Work', (Work,), {})
+        if decorator is not None:
+            trace(klass, decorator=decorator)
+
+    # 다른 프로세스의 간섭으로 생기는 오차를 줄이기 위해 모드를 번갈아 가며 여러 번 재고 가장 짧은 시간을 쓴다.
+    best = dict.fromkeys(modes, float('inf'))
+    with redirect_stdout(io.StringIO()):
+        for _ in range(10):
+            for name, klass in klasses.items():
+                best[name] = min(best[name], benchmark(klass))
+
+    baseline = best['트레이스 없음']
+    for name, elapsed in best.items():
+        overhead_ns = (elapsed - baseline) / 20_000 * 1e9
+        print(f'{name:>16}: {elapsed:.3f}초, '
+              f'트레이스 없을 때 대비 {(elapsed / baseline - 1) * 100:+6.1f}% '
+              f'(호출당 {overhead_ns:+6.0f}ns)')
+
+# 출력을 버리는데도 `trace_fn` 은 호출마다 수 마이크로초를 더 쓴다. 터미널에 출력하면 훨씬 더 느려진다.
+# `every` 나 `interval_ns` 로 표본을 추출하면 추가 비용은 래퍼 함수를 한 번 더 호출하는 비용(수백 나노초) 정도로 줄어들고,
+# 이 예제의 `run()` 에서는 몇 % 이내다. 다만 몇 나노초짜리 아주 짧은 메서드에서는 이 비용도 상대적으로 커진다.
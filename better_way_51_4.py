@@ -0,0 +1,347 @@
+""" better way 51_1, 51_2 의 `trace_fn` 은 호출한 스레드에서 곧바로 표준 출력에 한 줄을 쓴다.
+여러 스레드가 동시에 트레이스를 남기면 모두 표준 출력의 락을 두고 다투게 되고, 출력이 끝날 때까지 원래 일을 하지 못한다.
+`TraceSink` 는 트레이스를 모았다가 다른 스레드에서 한꺼번에 쓴다.
+1. 스레드마다 크기가 정해진 링 버퍼를 하나씩 가진다. 버퍼에 쓰는 스레드는 하나, 읽는 스레드(배경 스레드)도 하나뿐이므로 락이 필요 없다.
+   버퍼가 가득 차면 이벤트를 버리고 버린 개수를 센다.
+2. 배경 스레드는 `interval` 초마다 모든 버퍼를 비워서 `writer` 에 넘긴다.
+   이미 끝난 스레드의 버퍼는 비운 다음 버린다. 메모리 사용량은 `살아 있는 스레드 수 * capacity` 를 넘지 않는다.
+   `JsonLinesWriter` 는 한 줄에 이벤트 하나씩 JSON 으로, `BinaryWriter` 는 `struct` 로 묶은 이진 형식으로 쓴다.
+3. `sink_trace_fn` 은 출력하는 대신 (클래스, 메서드, 스레드, 시작 시각, 소요 시간) 을 담은 `TraceEvent` 를 싱크에 넘긴다.
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import weakref
+import struct
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import redirect_stdout
+from functools import wraps, partial
+from threading import Thread, Event, Lock, local
+
+from utils import colorprint
+from better_way_51_1 import TraceMeta
+from better_way_51_2 import trace
+
+
+TraceEvent = namedtuple(
+    'TraceEvent', ['klass', 'method', 'thread', 'start_ns', 'duration_ns'])
+
+
+class RingBuffer:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.head = 0 # 읽은 개수. 읽는 스레드만 바꾼다.
+        self.tail = 0 # 쓴 개수. 쓰는 스레드만 바꾼다.
+        self.dropped = 0
+
+    def push(self, item) -> bool:
+        if self.tail - self.head >= self.capacity:
+            self.dropped += 1
+            return False
+        self.slots[self.tail % self.capacity] = item
+        # 칸에 다 쓴 다음에 `tail` 을 옮겨야 읽는 스레드가 덜 쓴 칸을 읽지 않는다.
+        self.tail += 1
+        return True
+
+    def drain(self) -> list:
+        tail = self.tail
+        items = []
+        for i in range(self.head, tail):
+            j = i % self.capacity
+            items.append(self.slots[j])
+            self.slots[j] = None
+        self.head = tail
+        return items
+
+
+class JsonLinesWriter:
+    def __init__(self, file):
+        self.file = file
+        # 이벤트마다 `json.dumps` 를 부르면 느리다. 이름 부분은 한 번만 인코딩해서 재사용한다.
+        self.prefixes = {}
+
+    def prefix(self, klass: str, method: str) -> str:
+        key = (klass, method)
+        if key not in self.prefixes:
+            self.prefixes[key] = json.dumps(
+                {'klass': klass, 'method': method})[:-1]
+        return self.prefixes[key]
+
+    def write(self, events: list):
+        self.file.write(''.join(
+            f'{self.prefix(event.klass, event.method)}, '
+            f'"thread": {event.thread}, "start_ns": {event.start_ns}, '
+            f'"duration_ns": {event.duration_ns}}}\n'
+            for event in events
+        ))
+
+    def close(self):
+        self.file.flush()
+
+
+class BinaryWriter:
+    """ 이벤트 하나를 `(스레드, 시작 시각, 소요 시간, 이름 길이)` 헤더와 `클래스.메서드` 이름으로 씁니다.
+    """
+    header = struct.Struct('<QqqH')
+
+    def __init__(self, file):
+        self.file = file
+        self.names = {}
+
+    def write(self, events: list):
+        chunks = []
+        for event in events:
+            key = (event.klass, event.method)
+            if key not in self.names:
+                self.names[key] = f'{event.klass}.{event.method}'.encode()
+            name = self.names[key]
+            chunks.append(self.header.pack(
+                event.thread, event.start_ns, event.duration_ns, len(name)))
+            chunks.append(name)
+        self.file.write(b''.join(chunks))
+
+    def close(self):
+        self.file.flush()
+
+    @classmethod
+    def read(cls, file):
+        """ `write` 로 쓴 파일에서 `TraceEvent` 를 하나씩 읽어 돌려줍니다.
+        """
+        while header := file.read(cls.header.size):
+            thread, start_ns, duration_ns, n = cls.header.unpack(header)
+            klass, _, method = file.read(n).decode().rpartition('.')
+            yield TraceEvent(klass, method, thread, start_ns, duration_ns)
+
+
+class TraceSink:
+    def __init__(self, writer, capacity: int = 8192, interval: float = 0.05):
+        self.writer = writer
+        self.capacity = capacity
+        self.interval = interval
+        # `perf_counter_ns` 로 잰 시각을 벽시계 시각으로 바꾸기 위한 차이
+        self.offset_ns = time.time_ns() - time.perf_counter_ns()
+
+        self.lock = Lock() # 버퍼 목록과 `writer` 를 보호하기 위해 사용
+        self.buffers = [] # (버퍼를 만든 스레드의 약한 참조, 버퍼)
+        self.retired_dropped = 0 # 끝난 스레드의 버퍼에서 버린 이벤트 수
+        self.local = local()
+        self.event = Event() # 배경 스레드 종료를 위해 사용
+        self.thread = None
+
+    def buffer(self) -> RingBuffer:
+        """ 현재 스레드의 버퍼를 반환합니다. 처음 호출한 스레드라면 버퍼를 새로 만들어 등록한다.
+        배경 스레드는 첫 번째 버퍼를 등록할 때 시작한다.
+        """
+        try:
+            return self.local.buffer
+        except AttributeError:
+            buffer = self.local.buffer = RingBuffer(self.capacity)
+            with self.lock:
+                self.buffers.append(
+                    (weakref.ref(threading.current_thread()), buffer))
+                if self.thread is None:
+                    self.thread = Thread(target=self.run, daemon=True)
+                    self.thread.start()
+            return buffer
+
+    def emit(self, event: TraceEvent) -> bool:
+        return self.buffer().push(event)
+
+    def run(self):
+        while not self.event.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            alive = []
+            for thread_ref, buffer in self.buffers:
+                # 비우기 전에 확인해야 한다. 끝난 스레드는 더 이상 버퍼에 쓰지 않으므로 비운 뒤 버려도 된다.
+                thread = thread_ref()
+                finished = thread is None or not thread.is_alive()
+                events = buffer.drain()
+                if events:
+                    self.writer.write(events)
+                if finished:
+                    self.retired_dropped += buffer.dropped
+                else:
+                    alive.append((thread_ref, buffer))
+            self.buffers = alive
+
+    @property
+    def dropped(self) -> int:
+        with self.lock:
+            return self.retired_dropped + sum(
+                buffer.dropped for _, buffer in self.buffers)
+
+    def close(self):
+        """ 배경 스레드를 멈추고 남은 이벤트를 모두 씁니다. 파일은 `writer` 를 만든 쪽에서 닫는다.
+        """
+        self.event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+SINK = None
+SINK_LOCK = Lock()
+
+
+def default_sink() -> TraceSink:
+    """ 싱크를 정하지 않았을 때 쓰는, 표준 에러에 JSON lines 로 쓰는 싱크를 반환합니다.
+    모듈을 임포트할 때가 아니라 처음 필요할 때 만들고, 프로그램이 끝날 때 닫는다.
+    """
+    global SINK
+    if SINK is None:
+        with SINK_LOCK:
+            if SINK is None:
+                sink = TraceSink(JsonLinesWriter(sys.stderr))
+                atexit.register(sink.close)
+                SINK = sink
+    return SINK
+
+
+def sink_trace_fn(fn, sink=None):
+    if hasattr(fn, 'tracing'):
+        return fn
+    klass, _, method = getattr(fn, '__qualname__', fn.__name__).rpartition('.')
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        s = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            e = time.perf_counter_ns()
+            target = default_sink() if sink is None else sink
+            target.emit(TraceEvent(
+                klass,
+                method,
+                threading.get_ident(),
+                s + target.offset_ns,
+                e - s,
+            ))
+
+    wrapper.tracing = True
+    return wrapper
+
+
+def to_sink(sink):
+    """ `trace(klass, decorator=to_sink(sink))` 처럼 싱크를 정해서 쓰기 위한 데코레이터를 반환합니다.
+    """
+    return partial(sink_trace_fn, sink=sink)
+
+
+class SinkTraceMeta(TraceMeta):
+    decorator = staticmethod(sink_trace_fn)
+
+
+class Work:
+    def run(self):
+        i = 0
+        for _ in range(100):
+            i += 1
+
+
+def load(klass, n_thread=8, n_call=10_000) -> float:
+    """ `n_thread` 개의 스레드에서 `klass().run()` 을 `n_call` 번씩 호출하고 걸린 시간(초)을 반환합니다.
+    """
+    def worker():
+        obj = klass()
+        for _ in range(n_call):
+            obj.run()
+
+    threads = [Thread(target=worker) for _ in range(n_thread)]
+    s = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - s
+
+
+if __name__ == '__main__':
+    n_thread, n_call = 8, 10_000
+    # 스레드마다 객체를 하나씩 만들 때 `__new__` 도 한 번씩 트레이스된다.
+    n_event = n_thread * (n_call + 1)
+    colorprint(f'{n_thread}개의 스레드에서 `run()` 을 {n_call}번씩 호출')
+
+    klass = type('Work', (Work,), {})
+    elapsed = load(klass, n_thread, n_call)
+    print(f'트레이스 없음: {elapsed:.3f}초')
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # 비교를 위해 `trace_fn` 의 출력도 파일로 보낸다.
+        path = os.path.join(tmpdir, 'trace.txt')
+        klass = trace(type('Work', (Work,), {}))
+        with open(path, 'w') as f, redirect_stdout(f):
+            elapsed = load(klass, n_thread, n_call)
+        print(f'`trace_fn` (표준 출력): {elapsed:.3f}초')
+
+        path = os.path.join(tmpdir, 'trace.jsonl')
+        with open(path, 'w') as f, TraceSink(JsonLinesWriter(f)) as sink:
+            klass = trace(type('Work', (Work,), {}), decorator=to_sink(sink))
+            elapsed = load(klass, n_thread, n_call)
+        with open(path) as f:
+            lines = f.readlines()
+        print(f'`TraceSink` (JSON lines): {elapsed:.3f}초, '
+              f'{len(lines)}개 기록, {sink.dropped}개 버림')
+        assert len(lines) + sink.dropped == n_event
+        print(f'  첫 번째 이벤트: {lines[0].strip()}')
+
+        path = os.path.join(tmpdir, 'trace.bin')
+        with open(path, 'wb') as f, TraceSink(BinaryWriter(f)) as sink:
+            klass = trace(type('Work', (Work,), {}), decorator=to_sink(sink))
+            elapsed = load(klass, n_thread, n_call)
+        with open(path, 'rb') as f:
+            events = list(BinaryWriter.read(f))
+        print(f'`TraceSink` (이진 형식): {elapsed:.3f}초, '
+              f'{len(events)}개 기록, {sink.dropped}개 버림, '
+              f'파일 크기 {os.path.getsize(path) / 2**20:.2f}MiB')
+        assert len(events) + sink.dropped == n_event
+
+        # 버퍼가 작으면 이벤트를 버린다. 버린 개수는 정확히 센다.
+        path = os.path.join(tmpdir, 'small.jsonl')
+        with open(path, 'w') as f, TraceSink(
+                JsonLinesWriter(f), capacity=64, interval=1.0) as sink:
+            klass = trace(type('Work', (Work,), {}), decorator=to_sink(sink))
+            elapsed = load(klass, n_thread, n_call)
+        with open(path) as f:
+            n_line = sum(1 for _ in f)
+        print(f'`TraceSink` (capacity=64): {elapsed:.3f}초, '
+              f'{n_line}개 기록, {sink.dropped}개 버림')
+        assert n_line + sink.dropped == n_event
+
+        # 짧게 사는 스레드를 많이 만들어도, 끝난 스레드의 버퍼는 비운 다음 버린다.
+        path = os.path.join(tmpdir, 'many.jsonl')
+        n_batch, n_short = 30, 100
+        with open(path, 'w') as f, TraceSink(
+                JsonLinesWriter(f), interval=0.01) as sink:
+            klass = trace(type('Work', (Work,), {}), decorator=to_sink(sink))
+            n_buffer = 0
+            for _ in range(n_batch):
+                load(klass, n_short, 10)
+                n_buffer = max(n_buffer, len(sink.buffers))
+        with open(path) as f:
+            n_line = sum(1 for _ in f)
+        print(f'짧게 사는 스레드 {n_batch * n_short}개: '
+              f'버퍼는 최대 {n_buffer}개, 닫은 뒤 {len(sink.buffers)}개, '
+              f'{n_line}개 기록, {sink.dropped}개 버림')
+        assert n_line + sink.dropped == n_batch * n_short * 11
+
+# 호출한 스레드는 튜플 하나를 버퍼에 넣기만 하고, 문자열로 바꾸고 파일에 쓰는 일은 배경 스레드가 한다.
+# 다만 배경 스레드도 GIL 을 나누어 쓰기 때문에, CPU 가 하나뿐인 환경에서는 전체 시간이 `trace_fn` 과 비슷하거나 조금 더 걸린다.
+# 대신 스레드들이 표준 출력의 락을 두고 다투지 않고, 메모리 사용량이 정해져 있고, 기록을 다시 읽어 분석하기 쉽다.
+# 배경 스레드가 버퍼를 비우는 속도보다 이벤트가 빨리 쌓이면 버퍼 크기만큼만 남기고 나머지는 버린다.
@@ -0,0 +1,246 @@
+""" better way 51_1 의 `TraceMeta` 는 클래스의 모든 메서드를 가로채지만, 메서드마다 걸린 시간을 따로따로 출력할 뿐이다.
+어떤 메서드가 어떤 메서드를 불렀는지 모르면 시간이 어디에서 쓰였는지 알기 어렵다.
+`CallTreeProfiler` 는 가로챈 호출들로 호출 트리를 만든다.
+1. 스레드마다 호출 스택을 가진다. 감싼 함수가 호출되면 스택의 맨 위 노드 아래에 자식 노드를 만들고(이미 있으면 재사용) 스택에 넣는다.
+   같은 경로로 여러 번 호출되면 같은 노드에 호출 횟수와 시간을 더한다.
+2. 노드의 포함 시간(inclusive)은 함수 전체에 걸린 시간이고, 자기 시간(self)은 포함 시간에서 자식 노드들의 포함 시간을 뺀 시간이다.
+3. `collapsed()` 는 `a;b;c 자기 시간(마이크로초)` 형식의 줄들을 반환한다. flamegraph.pl, speedscope 같은 도구가 이 형식을 읽는다.
+4. 모듈 함수나 이미 만들어진 클래스의 메서드는 `profile_functions` 로 잠시 바꿔 끼우고, `with` 블록이 끝나면 되돌려 놓는다.
+   `@trace` 를 `Grid` 처럼 생성자가 인자를 받는 클래스에 적용하면 감싼 `object.__new__` 가 인자를 받지 못해 에러가 난다.
+"""
+
+import sys
+import time
+from contextlib import contextmanager, ExitStack
+from functools import wraps, partial
+from threading import Lock, local
+
+from utils import colorprint
+from better_way_51_1 import TraceMeta
+
+
+class CallNode:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.inclusive_ns = 0
+        self.children = {}
+
+    def child(self, name: str) -> 'CallNode':
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = CallNode(name)
+        return node
+
+    @property
+    def self_ns(self) -> int:
+        return self.inclusive_ns - sum(
+            child.inclusive_ns for child in self.children.values())
+
+    def walk(self, path=()):
+        """ `(경로, 노드)` 를 깊이 우선으로 하나씩 돌려줍니다.
+        """
+        path = path + (self.name,)
+        yield path, self
+        for child in self.children.values():
+            yield from child.walk(path)
+
+
+class CallTreeProfiler:
+    def __init__(self):
+        self.lock = Lock() # 스레드별 루트 목록을 보호하기 위해 사용
+        self.roots = []
+        self.local = local()
+
+    def stack(self) -> list:
+        """ 현재 스레드의 호출 스택을 반환합니다. 스택의 맨 아래는 스레드의 루트 노드다.
+        """
+        try:
+            return self.local.stack
+        except AttributeError:
+            root = CallNode('<root>')
+            self.local.stack = [root]
+            with self.lock:
+                self.roots.append(root)
+            return self.local.stack
+
+    def wrap(self, fn):
+        if hasattr(fn, 'tracing'):
+            return fn
+        name = getattr(fn, '__qualname__', fn.__name__)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            stack = self.stack()
+            node = stack[-1].child(name)
+            stack.append(node)
+            s = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                node.inclusive_ns += time.perf_counter_ns() - s
+                node.calls += 1
+                stack.pop()
+
+        wrapper.tracing = True
+        return wrapper
+
+    def merged(self) -> CallNode:
+        """ 스레드별 호출 트리를 하나로 합친 트리를 반환합니다.
+        """
+        def merge(into: CallNode, node: CallNode):
+            into.calls += node.calls
+            into.inclusive_ns += node.inclusive_ns
+            for child in node.children.values():
+                merge(into.child(child.name), child)
+
+        tree = CallNode('<root>')
+        with self.lock:
+            roots = list(self.roots)
+        for root in roots:
+            for child in root.children.values():
+                merge(tree.child(child.name), child)
+        tree.inclusive_ns = sum(
+            child.inclusive_ns for child in tree.children.values())
+        return tree
+
+    def collapsed(self) -> list[str]:
+        lines = []
+        for path, node in self.merged().walk():
+            self_us = node.self_ns // 1000
+            if len(path) > 1 and self_us > 0:
+                lines.append(f'{";".join(path[1:])} {self_us}')
+        return lines
+
+    def flat(self) -> dict:
+        """ 경로와 관계없이 함수 이름별로 `(호출 횟수, 포함 시간, 자기 시간)` 을 합칩니다.
+        재귀 호출이 있으면 포함 시간이 중복으로 더해진다.
+        """
+        result = {}
+        for path, node in self.merged().walk():
+            if len(path) == 1:
+                continue
+            calls, inclusive, self_ = result.get(node.name, (0, 0, 0))
+            result[node.name] = (
+                calls + node.calls,
+                inclusive + node.inclusive_ns,
+                self_ + node.self_ns,
+            )
+        return result
+
+    def report(self, file=None, limit=20):
+        file = sys.stdout if file is None else file
+        rows = sorted(
+            self.flat().items(), key=lambda item: item[1][2], reverse=True)
+        for name, (calls, inclusive, self_) in rows[:limit]:
+            print(f'{name:<40} 호출 {calls:>8}회, 포함 {inclusive / 1e6:9.3f}ms, '
+                  f'자기 {self_ / 1e6:9.3f}ms', file=file)
+
+    def reset(self):
+        with self.lock:
+            self.roots = []
+        self.local = local()
+
+
+PROFILER = CallTreeProfiler()
+
+
+def profile_fn(fn, profiler=None):
+    return (PROFILER if profiler is None else profiler).wrap(fn)
+
+
+def profiling(profiler):
+    """ `trace(klass, decorator=profiling(profiler))` 처럼 프로파일러를 정해서 쓰기 위한 데코레이터를 반환합니다.
+    """
+    return partial(profile_fn, profiler=profiler)
+
+
+class ProfileMeta(TraceMeta):
+    decorator = staticmethod(profile_fn)
+
+
+@contextmanager
+def replaced(target, name: str, value):
+    """ `with` 블록 안에서만 `target.name` 을 `value` 로 바꿉니다.
+    `target` 에 직접 있던 값이면 되돌려 놓고, 부모 클래스에게서 물려받은 값이면 지운다.
+    """
+    owned = name in vars(target)
+    original = vars(target).get(name)
+    setattr(target, name, value)
+    try:
+        yield
+    finally:
+        if owned:
+            setattr(target, name, original)
+        else:
+            delattr(target, name)
+
+
+@contextmanager
+def profile_functions(target, *names, profiler=None):
+    """ `with` 블록 안에서만 `target`(모듈 또는 클래스)의 함수들을 프로파일러로 감싼 함수로 바꿉니다.
+    """
+    with ExitStack() as stack:
+        for name in names:
+            fn = getattr(target, name)
+            stack.enter_context(replaced(target, name, profile_fn(fn, profiler)))
+        yield
+
+
+if __name__ == '__main__':
+    import better_way_56
+    from better_way_56 import Grid, ALIVE, simulate
+
+    grid = Grid(width=8, height=8)
+    grid.set(0, 3, ALIVE)
+    grid.set(1, 4, ALIVE)
+    grid.set(2, 2, ALIVE)
+    grid.set(2, 3, ALIVE)
+    grid.set(2, 4, ALIVE)
+
+    with profile_functions(Grid, 'get', 'set'), profile_functions(
+        better_way_56,
+        'step_cell',
+        'count_neighbors',
+        'game_logic',
+    ):
+        simulate_ = profile_fn(simulate)
+        for _ in range(2):
+            grid = simulate_(grid)
+
+    colorprint('`simulate` 의 함수별 자기 시간 순위')
+    PROFILER.report()
+
+    colorprint('\n접힌 스택(collapsed stack) 형식')
+    for line in PROFILER.collapsed():
+        print(line)
+    PROFILER.reset()
+
+    colorprint('\n메타클래스로 감싼 클래스의 접힌 스택')
+
+    class Parent(metaclass=ProfileMeta):
+        def run(self):
+            for _ in range(10):
+                self.step()
+
+        def step(self):
+            time.sleep(0.001)
+
+    class Child(Parent):
+        def step(self):
+            super().step()
+            self.extra()
+
+        def extra(self):
+            time.sleep(0.002)
+
+    # `Child` 를 만들 때 감싼 `Parent.__init_subclass__` 가 호출되어 기록된다. 그 기록은 지운다.
+    PROFILER.reset()
+    Child().run()
+    for line in PROFILER.collapsed():
+        print(line)
+
+# 자기 시간의 대부분은 `game_logic` 에서 쓰인다. `game_logic` 은 셀마다 I/O 를 흉내 내며 0.01초씩 기다리기 때문이다.
+# `Grid.get` 은 호출 횟수가 가장 많지만(셀마다 9번) 한 번에 걸리는 시간이 짧아서 전체에서 차지하는 비중은 작다.
+# 메타클래스로 감싼 `Child.step` 아래에 `super()` 로 부른 `Parent.step` 이 자식 노드로 기록된다.
+# `collapsed()` 의 결과를 파일로 저장해서 `flamegraph.pl` 에 넘기면 플레임 그래프를 그릴 수 있다.
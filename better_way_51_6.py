@@ -0,0 +1,190 @@
+""" better way 51_1 의 `TraceMeta` 나 51_2 의 `@trace` 를 적용하면 메서드가 래퍼로 영원히 바뀐다.
+시간을 잴 필요가 없을 때도 모든 호출이 래퍼를 거치고, `hasattr(fn, 'tracing')` 같은 장치의 비용도 그대로 남는다.
+`Tracer` 는 트레이스를 실행 중에 켜고 끌 수 있게 한다.
+1. 클래스를 등록할 때 트레이스할 메서드들의 원래 값(클래스 `__dict__` 에 있던 객체)을 기억해 둔다.
+   래퍼는 이때 한 번만 만들고, 부모 클래스의 래퍼가 아니라 항상 원래 함수를 감싼다. 두 번 감싸는 일이 없다.
+2. 켜면 래퍼를 `setattr` 하고, 끄면 원래 값을 그대로 되돌려 놓는다. 부모에게서 물려받은 메서드였다면 `delattr` 한다.
+   꺼져 있는 동안 클래스는 트레이스를 적용하기 전과 똑같으므로 추가 비용이 전혀 없다.
+3. 클래스별로(`enable(klass)`) 또는 등록된 모든 클래스에 대해(`enable()`) 켜고 끌 수 있다.
+4. `object` 에서 물려받은 메서드(`__new__`, `__init_subclass__` 등)는 감싸지 않는다.
+   감싼 `object.__new__` 는 생성자 인자를 받지 못한다. (better way 51_5 참고)
+   `staticmethod` 는 감싼 뒤에도 `staticmethod` 로 남긴다.
+"""
+
+import io
+from threading import Lock
+from contextlib import redirect_stdout
+
+from utils import colorprint
+from better_way_51_1 import trace_fn, trace_types
+from better_way_51_3 import benchmark
+
+
+MISSING = object() # 클래스 `__dict__` 에 없고 부모에게서 물려받은 메서드를 나타냄
+
+
+class Tracer:
+    def __init__(self, decorator=trace_fn):
+        self.decorator = decorator
+        self.lock = Lock()
+        self.originals = {} # 클래스 -> {이름: 원래 값 또는 `MISSING`}
+        self.wrappers = {} # 클래스 -> {이름: 래퍼}
+        self.enabled = set()
+
+    def original(self, klass, key):
+        """ `klass` 에서 `key` 로 찾을 수 있는, 트레이스를 적용하기 전의 값과 그 값을 가진 클래스를 반환합니다.
+        """
+        for base in klass.__mro__:
+            if key not in base.__dict__:
+                continue
+            original = self.originals.get(base, {}).get(key)
+            if original is MISSING:
+                # `base` 에 있는 것은 물려받은 메서드의 래퍼다. 더 위에서 찾는다.
+                continue
+            if original is not None:
+                return base, original
+            return base, base.__dict__[key]
+        raise AttributeError(key)
+
+    def wrap(self, raw):
+        if isinstance(raw, staticmethod):
+            return staticmethod(self.decorator(raw.__func__))
+        return self.decorator(raw)
+
+    def register(self, klass, enabled=True):
+        with self.lock:
+            originals, wrappers = {}, {}
+            for key in dir(klass):
+                if not isinstance(getattr(klass, key), trace_types):
+                    continue
+                owner, raw = self.original(klass, key)
+                if owner is object:
+                    continue
+                originals[key] = raw if owner is klass else MISSING
+                wrappers[key] = self.wrap(raw)
+            self.originals[klass] = originals
+            self.wrappers[klass] = wrappers
+        if enabled:
+            self.enable(klass)
+        return klass
+
+    def classes(self, klass=None) -> list:
+        return list(self.originals) if klass is None else [klass]
+
+    def enable(self, klass=None):
+        with self.lock:
+            for klass in self.classes(klass):
+                for key, wrapper in self.wrappers[klass].items():
+                    setattr(klass, key, wrapper)
+                self.enabled.add(klass)
+
+    def disable(self, klass=None):
+        with self.lock:
+            for klass in self.classes(klass):
+                for key, original in self.originals[klass].items():
+                    if original is MISSING:
+                        if key in klass.__dict__:
+                            delattr(klass, key)
+                    else:
+                        setattr(klass, key, original)
+                self.enabled.discard(klass)
+
+    def is_enabled(self, klass) -> bool:
+        return klass in self.enabled
+
+
+TRACER = Tracer()
+
+
+def toggleable_trace(klass):
+    """ `@trace` 와 같지만, 나중에 `disable` 로 원래 메서드를 되돌릴 수 있습니다.
+    """
+    return TRACER.register(klass)
+
+
+def enable(klass=None):
+    TRACER.enable(klass)
+
+
+def disable(klass=None):
+    TRACER.disable(klass)
+
+
+class ToggleTraceMeta(type):
+    def __new__(meta, name, bases, class_dict):
+        klass = super().__new__(meta, name, bases, class_dict)
+        return TRACER.register(klass)
+
+
+class ToggleTraceClass(metaclass=ToggleTraceMeta):
+    def run(self):
+        i = 0
+        for _ in range(100):
+            i += 1
+
+    @staticmethod
+    def static_run():
+        i = 0
+        for _ in range(100):
+            i += 1
+
+
+class ToggleTraceChildrenClass(ToggleTraceClass):
+    def child_run(self):
+        i = 0
+        for _ in range(1000):
+            i += 1
+
+
+class Work:
+    # 래퍼의 비용이 잘 드러나도록 아주 짧은 메서드를 사용한다.
+    def run(self):
+        return self
+
+
+if __name__ == '__main__':
+    colorprint('메타클래스로 등록, 트레이스 켜짐')
+    obj = ToggleTraceChildrenClass()
+    obj.run()
+    obj.child_run()
+    obj.static_run()
+    # 물려받은 메서드도 한 번만 감싸므로 "1회" 출력됨
+
+    colorprint('\n모든 클래스의 트레이스 끔')
+    disable()
+    obj.run()
+    obj.child_run()
+    obj.static_run()
+    # 아무것도 출력되지 않음
+
+    colorprint('\n자식 클래스만 트레이스 켬')
+    enable(ToggleTraceChildrenClass)
+    obj.run()
+    ToggleTraceClass().run()
+    # 자식 클래스 객체의 호출만 "1회" 출력됨
+    disable()
+
+    colorprint('\n트레이스 상태에 따른 `run()` 호출 비용 비교')
+    untraced = type('Work', (Work,), {})
+    disabled = toggleable_trace(type('Work', (Work,), {}))
+    disable(disabled)
+    enabled = toggleable_trace(type('Work', (Work,), {}))
+    # 꺼져 있는 클래스에는 래퍼가 하나도 남아 있지 않다.
+    assert 'run' not in disabled.__dict__
+    assert disabled().run.__func__ is Work.run
+
+    n_call = 1_000_000
+    klasses = {'트레이스 없음': untraced, '꺼짐': disabled, '켜짐': enabled}
+    best = dict.fromkeys(klasses, float('inf'))
+    with redirect_stdout(io.StringIO()):
+        for _ in range(5):
+            for name, klass in klasses.items():
+                best[name] = min(best[name], benchmark(klass, n=n_call))
+
+    baseline = best['트레이스 없음']
+    for name, elapsed in best.items():
+        print(f'{name:>8}: 호출당 {elapsed / n_call * 1e9:6.0f}ns, '
+              f'트레이스 없을 때 대비 {(elapsed / baseline - 1) * 100:+7.1f}%')
+
+# 트레이스를 끈 클래스는 트레이스를 적용하지 않은 클래스와 호출 비용이 같다. (차이는 측정 오차 범위 안이다)
+# 켜면 `trace_fn` 의 비용이 그대로 더해진다.
@@ -0,0 +1,79 @@
+""" better way 54 의 `LockingCounter` 는 20개의 스레드가 증가시킬 때마다 하나의 `Lock` 을 두고 다툰다.
+값이 맞는 대신 `Lock` 을 잡고 놓는 비용과 경합 때문에 훨씬 느려진다.
+`ShardedCounter` 는 카운터를 스레드마다 하나씩 있는 칸(cell)으로 나눈다.
+1. 각 스레드는 자기 칸에만 값을 더한다. 한 칸에 쓰는 스레드는 하나뿐이므로 `Lock` 이 없어도 값을 잃어버리지 않는다.
+2. 값을 읽을 때(`count`) 모든 칸을 합친다. `Lock` 은 새 칸을 등록하거나 칸을 합칠 때만 잡는다.
+   스레드가 아직 더하고 있는 동안 읽은 값은 조금 늦은 값일 수 있지만, 모든 스레드를 조인한 뒤에는 정확하다.
+3. `increment_many` 는 여러 번의 증가를 한 번으로 묶는다. `LockingCounter.increment_many` 도 `Lock` 을 한 번만 잡는다.
+"""
+
+from threading import Lock, local
+
+from utils import colorprint
+from better_way_54 import (
+    UnLockingCounter,
+    LockingCounter,
+    trial,
+    threading_trial,
+    n_thread,
+    expected,
+)
+
+
+class ShardedCounter:
+    def __init__(self) -> None:
+        self.lock = Lock() # 칸 목록을 보호하기 위해 사용
+        self.cells = []
+        self.local = local()
+
+    def cell(self) -> list:
+        """ 현재 스레드의 칸을 반환합니다. 처음 호출한 스레드라면 칸을 새로 만들어 등록한다.
+        """
+        try:
+            return self.local.cell
+        except AttributeError:
+            cell = self.local.cell = [0]
+            with self.lock:
+                self.cells.append(cell)
+            return cell
+
+    def increment(self, offset) -> None:
+        cell = self.cell()
+        cell[0] += int(str(offset))
+
+    def increment_many(self, offsets) -> None:
+        total = sum(int(str(offset)) for offset in offsets)
+        cell = self.cell()
+        cell[0] += int(str(total))
+
+    @property
+    def count(self) -> int:
+        with self.lock:
+            return sum(cell[0] for cell in self.cells)
+
+
+if __name__ == '__main__':
+    counters = [UnLockingCounter, LockingCounter, ShardedCounter]
+    results = []
+
+    for batch_size in (None, 1000):
+        how = '하나씩' if batch_size is None else f'{batch_size}개씩 묶어서'
+        for counter_cls in counters:
+            colorprint(f'`{counter_cls.__name__}`, 싱글 스레드로 실행, {how} 증가')
+            found, elapsed = trial(counter_cls(), batch_size)
+            results.append((counter_cls.__name__, 1, how, found, elapsed))
+
+            colorprint(f'`{counter_cls.__name__}`, 멀티({n_thread}개) 스레드로 실행, {how} 증가')
+            found, elapsed = threading_trial(counter_cls(), batch_size)
+            results.append((counter_cls.__name__, n_thread, how, found, elapsed))
+
+    colorprint('정확성과 처리량 비교')
+    for name, threads, how, found, elapsed in results:
+        ok = 'O' if found == expected else 'X'
+        print(f'{name:>16} 스레드 {threads:>2}개 {how:>12}: 정확 {ok}, '
+              f'초당 {expected / elapsed:>12,.0f}회 증가')
+
+# `UnLockingCounter` 는 멀티 스레드에서 값을 잃어버린다.
+# 하나씩 증가시키면 `ShardedCounter` 는 `Lock` 없이도 정확한 값을 얻고, 20개의 스레드에서 `LockingCounter` 보다 약 2배 빠르다.
+# 1000개씩 묶어서 증가시키면 `Lock` 을 잡는 횟수가 1000분의 1로 줄어서 세 카운터의 처리량이 거의 같아진다.
+# 이때 `UnLockingCounter` 의 데이터 경합은 드물게 일어나지만, 여전히 일어날 수 있다.
@@ -0,0 +1,152 @@
+""" better way 54, 54_1 의 카운터들은 한 프로세스 안의 스레드끼리만 값을 나눌 수 있다.
+프로세스마다 메모리가 따로 있기 때문에, 프로세스 풀의 작업자들이 센 값을 합치려면 공유 메모리가 필요하다.
+1. `SharedCounter` 는 `multiprocessing.Value` 에 값을 저장한다. 값은 공유 메모리에 있어서 모든 프로세스가 같은 값을 본다.
+   `+=` 는 읽기와 쓰기 두 단계로 이루어지므로 `Value` 에 딸린 락을 잡고 증가시킨다. (원자적 증가)
+2. 증가시킬 때마다 프로세스 사이의 락을 잡으면 느리다. `BufferedSharedCounter` 는 프로세스 안에서 값을 모아 두었다가
+   `flush_every` 번마다 한 번씩만 공유 메모리에 더한다. 프로세스가 끝나기 전에는 반드시 `flush` 를 호출해야 한다.
+   자식 프로세스는 부모가 아직 더하지 않은 값까지 복사해 가므로, 프로세스 id 가 바뀌었으면 모아 둔 값을 버리고 0부터 센다.
+   모아 두는 값은 락 없이 바꾸므로 한 프로세스 안의 여러 스레드가 같은 카운터를 쓰면 안 된다.
+3. `multiprocessing_trial` 은 `threading_trial` 과 같은 방법으로 `n_thread` 개의 프로세스를 띄워 값을 확인한다.
+"""
+
+import os
+import time
+import multiprocessing
+from multiprocessing import Process
+
+from utils import colorprint
+from better_way_54 import (
+    worker,
+    report,
+    trial,
+    n_thread,
+    how_many,
+    expected,
+)
+
+
+class SharedCounter:
+    def __init__(self) -> None:
+        self.value = multiprocessing.Value('q', 0)
+
+    def increment(self, offset) -> None:
+        with self.value.get_lock():
+            self.value.value += int(str(offset))
+
+    def increment_many(self, offsets) -> None:
+        total = sum(int(str(offset)) for offset in offsets)
+        with self.value.get_lock():
+            self.value.value += int(str(total))
+
+    def flush(self) -> None:
+        pass
+
+    @property
+    def count(self) -> int:
+        with self.value.get_lock():
+            return self.value.value
+
+
+class BufferedSharedCounter(SharedCounter):
+    """ 한 프로세스 안에서는 스레드 안전하지 않습니다. 프로세스마다 스레드 하나에서만 사용하세요.
+    """
+    def __init__(self, flush_every: int = 1000) -> None:
+        super().__init__()
+        self.flush_every = flush_every
+        self.reset()
+
+    def reset(self) -> None:
+        # 아래 값들은 프로세스마다 따로 가진다.
+        # 자식 프로세스는 부모의 값을 복사해 가므로, `pid` 가 다르면 부모가 모아 둔 값이다.
+        self.pid = os.getpid()
+        self.pending = 0
+        self.n_pending = 0
+
+    def check_process(self) -> None:
+        if self.pid != os.getpid():
+            # 부모가 모아 둔 값은 부모가 `flush` 한다. 여기서 다시 더하면 두 번 세게 된다.
+            self.reset()
+
+    def increment(self, offset) -> None:
+        self.check_process()
+        self.pending += int(str(offset))
+        self.n_pending += 1
+        if self.n_pending >= self.flush_every:
+            self.flush()
+
+    def increment_many(self, offsets) -> None:
+        self.check_process()
+        for offset in offsets:
+            self.pending += int(str(offset))
+            self.n_pending += 1
+        if self.n_pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        self.check_process()
+        if self.n_pending == 0:
+            return
+        with self.value.get_lock():
+            self.value.value += self.pending
+        self.pending = 0
+        self.n_pending = 0
+
+
+def process_worker(how_many, counter, batch_size=None):
+    worker(how_many, counter, batch_size)
+    # 프로세스 안에 모아 둔 값이 남아 있으면 공유 메모리에 더한다.
+    counter.flush()
+
+
+def multiprocessing_trial(counter, batch_size=None):
+    s = time.time()
+    processes = []
+    for i in range(n_thread):
+        # 카운터는 자식 프로세스로 복사되지만, 카운터 안의 `Value` 는 공유 메모리를 가리킨다.
+        process = Process(
+            target=process_worker,
+            args=(how_many, counter, batch_size)
+        )
+        processes.append(process)
+        process.start()
+
+    for process in processes:
+        process.join()
+    e = time.time()
+
+    found = counter.count
+    report(found, e - s)
+    return found, e - s
+
+
+if __name__ == '__main__':
+    colorprint('`SharedCounter`, 싱글 프로세스로 실행')
+    trial(SharedCounter())
+
+    colorprint(f'`SharedCounter`, 멀티({n_thread}개) 프로세스로 실행')
+    multiprocessing_trial(SharedCounter())
+
+    colorprint(f'`SharedCounter`, 멀티({n_thread}개) 프로세스로 실행, 1000개씩 묶어서 증가')
+    multiprocessing_trial(SharedCounter(), batch_size=1000)
+
+    colorprint(f'`BufferedSharedCounter`, 멀티({n_thread}개) 프로세스로 실행')
+    found, _ = multiprocessing_trial(BufferedSharedCounter(flush_every=1000))
+    assert found == expected
+
+    colorprint('부모 프로세스가 아직 더하지 않은 값이 있을 때 자식 프로세스 실행')
+    counter = BufferedSharedCounter(flush_every=1000)
+    counter.increment(1)
+    processes = [
+        Process(target=process_worker, args=(10, counter)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    counter.flush()
+    print(f'카운터는 41 이어야 함, 찾은 값 {counter.count}')
+    assert counter.count == 41
+
+# `SharedCounter` 는 증가시킬 때마다 프로세스 사이의 락을 잡기 때문에 `LockingCounter` 보다도 느리다.
+# `BufferedSharedCounter` 는 프로세스마다 `how_many / flush_every` 번만 락을 잡으므로
+# 묶어서 증가시킨 `SharedCounter` 처럼 빠르고, 호출하는 쪽은 `increment` 를 그대로 쓸 수 있다.
+# CPU 가 여러 개라면 프로세스들이 동시에 실행되므로 스레드보다 더 빨라진다.
@@ -2,11 +2,12 @@
 파이프라인을 구축할 때에는 스레드를 이용하고 생산자-소비자 큐를 이용하면 좋다.
 하지만 효율적인 생산자-소비자 큐를 만드는 일은 간단하지 않다.
 아래 소스코드는 모범적이지 못한 구현의 예시다.
+폴링 대신 `Condition` 으로 기다리는 방법(`timeout` 을 지정한 `Worker`)도 함께 비교한다.
 """
 
 import time
 from collections import deque
-from threading import Thread, Lock, Event
+from threading import Thread, Lock, Event, Condition
 
 from utils import colorprint
 
@@ -15,27 +16,50 @@ class MyQueue:
     def __init__(self) -> None:
         self.items = deque()
         self.lock = Lock()
+        # 두 조건 변수는 같은 락을 공유한다.
+        self.not_empty = Condition(self.lock)
+        self.count_changed = Condition(self.lock)
 
     def put(self, item):
         with self.lock:
             self.items.append(item)
-
-    def get(self):
+            self.not_empty.notify()
+            self.count_changed.notify_all()
+
+    def get(self, block=False, timeout=None):
+        """ `block` 이 `False` 이면 큐가 비어 있을 때 곧바로 `IndexError` 를 발생시킨다.
+        `True` 이면 아이템이 들어올 때까지 최대 `timeout` 초 동안 잠들어 기다리고,
+        그래도 비어 있으면 `IndexError` 를 발생시킨다.
+        """
         with self.lock:
+            if block:
+                self.not_empty.wait_for(lambda: self.items, timeout)
             return self.items.popleft()
 
+    def wait_until_count(self, count, timeout=None) -> bool:
+        """ 큐에 아이템이 `count` 개 이상 쌓일 때까지 잠들어 기다립니다.
+        """
+        with self.lock:
+            return self.count_changed.wait_for(
+                lambda: len(self.items) >= count, timeout)
+
 
 class Worker(Thread):
-    def __init__(self, func, in_queue, out_queue):
+    def __init__(self, func, in_queue, out_queue, timeout=None):
         super().__init__()
         self.func = func
         self.in_queue = in_queue
         self.out_queue = out_queue
+        # `None` 이면 폴링하고, 아니면 최대 `timeout` 초씩 잠들어 기다린다.
+        self.timeout = timeout
         self.polled_count = 0
         self.work_done = 0
         self.event = Event() # 스레드 종료를 위해 사용
 
     def run(self):
+        if self.timeout is not None:
+            self.run_blocking()
+            return
         while True:
             self.polled_count += 1
             try:
@@ -57,6 +81,19 @@ class Worker(Thread):
             if self.event.is_set():
                 break
 
+    def run_blocking(self):
+        # 큐가 비어 있으면 잠들어 있다가 `put` 이 깨워 준다.
+        # `timeout` 은 종료 이벤트를 확인하기 위한 용도이므로 넉넉하게 잡아도 된다.
+        while not self.event.is_set():
+            self.polled_count += 1
+            try:
+                item = self.in_queue.get(block=True, timeout=self.timeout)
+            except IndexError:
+                continue
+            result = self.func(item)
+            self.out_queue.put(result)
+            self.work_done += 1
+
 
 def step1_download(item):
     time.sleep(0.001)
@@ -73,15 +110,15 @@ def step3_upload(item):
     return item
 
 
-if __name__ == '__main__':
+def run_pipeline(timeout=None):
     download_queue = MyQueue()
     reszie_queue = MyQueue()
     upload_queue = MyQueue()
     done_queue = MyQueue()
     threads = [
-        Worker(step1_download, download_queue, reszie_queue),
-        Worker(step1_download, reszie_queue, upload_queue),
-        Worker(step1_download, upload_queue, done_queue),
+        Worker(step1_download, download_queue, reszie_queue, timeout),
+        Worker(step1_download, reszie_queue, upload_queue, timeout),
+        Worker(step1_download, upload_queue, done_queue, timeout),
     ]
 
     for thread in threads:
@@ -89,17 +126,22 @@ if __name__ == '__main__':
 
     colorprint('큐에 데이터 입력, 시간 측정 시작')
     t_start = time.time()
+    cpu_start = time.process_time()
 
     # 데이터를 입력한다.
     for _ in range(1000):
         download_queue.put(object())
 
     # 작업이 끝나기를 기다린다.
-    while len(done_queue.items) < 1000:
-        # 이 구현의 두 번째 문제다.
-        # 작업이 제대로 완료되었는지를 검사하기 위해 바쁜 대기(busy waiting)을 수행한다.
-        # 현재 구현대로라면 작업자 스레드에게 루프를 중단할 시점임을 알려줄 방법이 없다.
-        pass
+    if timeout is None:
+        while len(done_queue.items) < 1000:
+            # 이 구현의 두 번째 문제다.
+            # 작업이 제대로 완료되었는지를 검사하기 위해 바쁜 대기(busy waiting)을 수행한다.
+            # 현재 구현대로라면 작업자 스레드에게 루프를 중단할 시점임을 알려줄 방법이 없다.
+            pass
+    else:
+        # 조건 변수로 기다리면 메인 스레드는 아이템이 들어올 때만 깨어난다.
+        done_queue.wait_until_count(1000)
 
     # 스레드 종료
     for thread in threads:
@@ -107,13 +149,25 @@ if __name__ == '__main__':
         thread.join()
 
     t_end = time.time()
+    cpu_end = time.process_time()
     colorprint('모든 스레드들의 조인 완료, 시간 측정 끝')
 
     processed = len(done_queue.items)
     polled = sum(worker.polled_count for worker in threads)
+    work_done = sum(worker.work_done for worker in threads)
     print(f'{processed}개의 아이템을 처리하기 위해, '
-          f'폴링을 {polled}번 수행했습니다.')
-    print(f'총 처리 시간은 {t_end-t_start:3f}초 입니다.')
+          f'폴링을 {polled}번 수행했습니다. '
+          f'(헛된 폴링 {polled - work_done}번)')
+    print(f'총 처리 시간은 {t_end-t_start:3f}초, '
+          f'CPU 시간은 {cpu_end-cpu_start:3f}초 입니다.')
+
+
+if __name__ == '__main__':
+    colorprint('폴링하는 작업자')
+    run_pipeline()
+
+    colorprint('조건 변수로 기다리는 작업자')
+    run_pipeline(timeout=0.1)
 
 # 이 구현의 마지막 문제는, 파이프라인의 진행이 막히는 경우다.
 # 파이프라인의 일부가 작업을 제대로 처리하지 못하면 스레드를 연결하는 큐들 중 일부가
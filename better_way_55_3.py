@@ -0,0 +1,198 @@
+""" better way 55_2 의 파이프라인은 OS 스레드와 `queue.Queue` 로 만들어져 있다.
+단계마다 하는 일이 블로킹 I/O 뿐이라면, 진행 중인 아이템 하나마다 스레드를 하나씩 쓰는 것은 낭비다.
+같은 파이프라인을 이벤트 루프 위에서 `asyncio.Queue` 로 만들 수 있다. (better way 60 참고)
+1. `AsyncBetterQueue` 는 `BetterQueue` 와 똑같이 센티넬로 닫고, `async for` 로 순회한다.
+2. `AsyncStoppableWorker` 는 스레드 대신 태스크로 돈다. 단계별 동시성은 작업자 태스크의 수로 정한다.
+   태스크는 스레드보다 훨씬 가벼워서 단계마다 수천 개를 띄워도 괜찮다.
+3. 단계 함수가 코루틴 함수가 아니면 `run_in_executor` 로 스레드 풀에서 실행한다.
+   이렇게 하면 `step1_download` 같은 기존의 블로킹 함수도 그대로 재사용할 수 있다.
+"""
+
+import time
+import asyncio
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import colorprint
+from better_way_55_1 import (
+    step1_download,
+    step2_resize,
+    step3_upload
+)
+from better_way_55_2 import BetterQueue, start_threads, stop_threads
+
+
+class AsyncBetterQueue(asyncio.Queue):
+    SENTINEL = object()
+
+    async def close(self):
+        await self.put(self.SENTINEL)
+
+    async def __aiter__(self):
+        while True:
+            item = await self.get()
+            try:
+                if item is self.SENTINEL:
+                    return
+                yield item
+            finally:
+                self.task_done()
+
+
+def to_coroutine_function(
+    func: typing.Callable,
+    executor: ThreadPoolExecutor = None,
+) -> typing.Callable:
+    """ 코루틴 함수는 그대로 반환하고, 일반 함수는 `run_in_executor` 로 감쌉니다.
+    `executor` 가 `None` 이면 이벤트 루프의 기본 스레드 풀을 사용한다.
+    """
+    if asyncio.iscoroutinefunction(func):
+        return func
+
+    async def run(item):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, func, item)
+
+    return run
+
+
+class AsyncStoppableWorker:
+    def __init__(self, func, in_queue, out_queue, executor=None):
+        self.func = to_coroutine_function(func, executor)
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.task = None
+
+    async def run(self):
+        async for item in self.in_queue:
+            result = await self.func(item)
+            await self.out_queue.put(result)
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def join(self):
+        await self.task
+
+
+def start_workers(count, *args, **kwargs) -> list[AsyncStoppableWorker]:
+    workers = [AsyncStoppableWorker(*args, **kwargs) for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+async def stop_workers(
+    queue: AsyncBetterQueue,
+    workers: list[AsyncStoppableWorker],
+):
+    for _ in workers:
+        await queue.close()
+    await queue.join()
+
+    for worker in workers:
+        await worker.join()
+
+
+async def async_step1_download(item):
+    await asyncio.sleep(0.001)
+    return item
+
+
+async def async_step2_resize(item):
+    await asyncio.sleep(0.001)
+    return item
+
+
+async def async_step3_upload(item):
+    await asyncio.sleep(0.001)
+    return item
+
+
+async def run_pipeline(
+    steps: list[typing.Callable],
+    n_item: int,
+    concurrency: int,
+    executor: ThreadPoolExecutor = None,
+) -> AsyncBetterQueue:
+    queues = [AsyncBetterQueue(1000) for _ in steps]
+    done_queue = AsyncBetterQueue()
+    out_queues = queues[1:] + [done_queue]
+
+    stages = []
+    for step, in_queue, out_queue in zip(steps, queues, out_queues):
+        workers = start_workers(
+            concurrency, step, in_queue, out_queue, executor=executor)
+        stages.append((in_queue, workers))
+
+    for _ in range(n_item):
+        await queues[0].put(object())
+
+    for in_queue, workers in stages:
+        await stop_workers(in_queue, workers)
+    return done_queue
+
+
+def run_thread_pipeline(n_item: int, concurrency: int) -> BetterQueue:
+    """ better way 55_2 와 같은 스레드 파이프라인입니다. 비교를 위해 사용한다.
+    """
+    download_queue = BetterQueue(1000)
+    resize_queue = BetterQueue(1000)
+    upload_queue = BetterQueue(1000)
+    done_queue = BetterQueue()
+
+    download_threads = start_threads(
+        concurrency, step1_download, download_queue, resize_queue)
+    resize_threads = start_threads(
+        concurrency, step2_resize, resize_queue, upload_queue)
+    upload_threads = start_threads(
+        concurrency, step3_upload, upload_queue, done_queue)
+
+    for _ in range(n_item):
+        download_queue.put(object())
+
+    stop_threads(download_queue, download_threads)
+    stop_threads(resize_queue, resize_threads)
+    stop_threads(upload_queue, upload_threads)
+    return done_queue
+
+
+if __name__ == '__main__':
+    n_item = 1000
+    colorprint(f'단계별 동시성에 따른 처리량 비교 ({n_item}개 아이템)')
+    for concurrency in (1, 10, 100):
+        t_start = time.time()
+        done_queue = run_thread_pipeline(n_item, concurrency)
+        t_end = time.time()
+        assert done_queue.qsize() == n_item
+        print(f'동시성 {concurrency:>3}, 스레드: '
+              f'{n_item / (t_end - t_start):8.0f}개/초')
+
+        t_start = time.time()
+        done_queue = asyncio.run(run_pipeline(
+            [async_step1_download, async_step2_resize, async_step3_upload],
+            n_item,
+            concurrency,
+        ))
+        t_end = time.time()
+        assert done_queue.qsize() == n_item
+        print(f'동시성 {concurrency:>3}, 코루틴: '
+              f'{n_item / (t_end - t_start):8.0f}개/초')
+
+        # 기존의 블로킹 함수는 스레드 풀에서 실행한다.
+        with ThreadPoolExecutor(max_workers=concurrency * 3) as executor:
+            t_start = time.time()
+            done_queue = asyncio.run(run_pipeline(
+                [step1_download, step2_resize, step3_upload],
+                n_item,
+                concurrency,
+                executor=executor,
+            ))
+            t_end = time.time()
+        assert done_queue.qsize() == n_item
+        print(f'동시성 {concurrency:>3}, `run_in_executor`: '
+              f'{n_item / (t_end - t_start):8.0f}개/초')
+
+# 단계별 동시성이 낮을 때는 스레드 버전과 코루틴 버전의 처리량이 비슷하다.
+# 동시성을 100 정도로 높이면 스레드 버전은 스레드 전환 비용 때문에 더 빨라지지 않지만,
+# 코루틴 버전은 스레드 버전의 약 2배의 처리량을 보여준다.
@@ -0,0 +1,191 @@
+""" better way 55_2 의 `start_threads(count, ...)` 는 단계별 스레드 수를 시작할 때 정하고 바꾸지 않는다.
+실제로는 단계마다 처리 속도가 다르기 때문에, 어떤 단계의 큐는 계속 쌓이는데
+다른 단계의 스레드들은 놀고 있는 일이 생긴다.
+`StageSupervisor` 는 단계 하나를 맡아서 주기적으로 입력 큐의 깊이(`qsize()`)와 처리량을 확인하고
+최솟값과 최댓값 사이에서 `StoppableWorker` 를 늘리거나 줄인다.
+1. 큐가 쌓이면 작업자를 하나 늘린다. 단, 다음 단계의 큐가 이미 많이 차 있으면 늘리지 않는다.
+2. 큐가 비어 있고 작업자들이 대부분 놀고 있으면 작업자를 하나 줄인다.
+   작업자를 줄일 때는 기존의 종료 방법 그대로 센티넬을 하나 넣는다. 센티넬을 꺼낸 작업자 하나만 종료된다.
+3. 스케일링 결정과 단계별 가동률(작업자들이 함수 실행에 쓴 시간의 비율)은 `metrics()` 로 확인할 수 있다.
+"""
+
+import time
+from threading import Thread, Event, Lock
+
+from utils import colorprint
+from better_way_55_1 import step1_download, step3_upload
+from better_way_55_2 import BetterQueue, StoppableWorker, batched
+
+
+class StageSupervisor(Thread):
+    def __init__(
+        self,
+        func,
+        in_queue: BetterQueue,
+        out_queue: BetterQueue,
+        min_workers: int = 1,
+        max_workers: int = 10,
+        interval: float = 0.05,
+        scale_up_depth: int = 10,
+        scale_down_utilization: float = 0.5,
+        **worker_kwargs,
+    ):
+        super().__init__(daemon=True)
+        assert 1 <= min_workers <= max_workers
+        self.func = self.instrument(func)
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.interval = interval
+        self.scale_up_depth = scale_up_depth
+        self.scale_down_utilization = scale_down_utilization
+        self.worker_kwargs = worker_kwargs
+
+        self.lock = Lock()
+        self.event = Event() # 감시 루프 종료를 위해 사용
+        self.workers = []
+        self.started = 0
+        self.retired = 0 # 지금까지 넣은 센티넬의 수
+        self.processed = 0
+        self.busy_time = 0.0
+        self.decisions = []
+        self.last_metrics = {}
+
+        for _ in range(min_workers):
+            self.add_worker()
+
+    def instrument(self, func):
+        """ 처리한 아이템 수와 함수 실행에 쓴 시간을 세도록 함수를 감쌉니다.
+        """
+        def wrapper(item):
+            s = time.perf_counter()
+            try:
+                return func(item)
+            finally:
+                e = time.perf_counter()
+                n = len(item) if hasattr(func, 'batched') else 1
+                with self.lock:
+                    self.processed += n
+                    self.busy_time += e - s
+
+        if hasattr(func, 'batched'):
+            return batched(wrapper)
+        return wrapper
+
+    @property
+    def n_workers(self) -> int:
+        # 센티넬을 받았거나 받을 작업자는 세지 않는다.
+        return self.started - self.retired
+
+    def add_worker(self):
+        worker = StoppableWorker(
+            self.func, self.in_queue, self.out_queue, **self.worker_kwargs)
+        worker.start()
+        self.workers.append(worker)
+        self.started += 1
+
+    def retire_worker(self):
+        self.in_queue.close()
+        self.retired += 1
+
+    def run(self):
+        last_processed, last_busy = 0, 0.0
+        last_time = time.perf_counter()
+        while not self.event.wait(self.interval):
+            now = time.perf_counter()
+            with self.lock:
+                processed, busy = self.processed, self.busy_time
+            elapsed = now - last_time
+            n_workers = self.n_workers
+            depth = self.in_queue.qsize()
+            throughput = (processed - last_processed) / elapsed
+            utilization = (busy - last_busy) / (elapsed * n_workers)
+            last_processed, last_busy, last_time = processed, busy, now
+
+            self.workers = [w for w in self.workers if w.is_alive()]
+            self.last_metrics = {
+                'workers': n_workers,
+                'depth': depth,
+                'throughput': throughput,
+                'utilization': min(utilization, 1.0),
+            }
+
+            # 다음 단계의 큐가 절반 이상 차 있으면 작업자를 늘려 봐야 `put` 에서 기다릴 뿐이다.
+            out_maxsize = self.out_queue.maxsize
+            downstream_busy = (
+                out_maxsize > 0
+                and self.out_queue.qsize() * 2 >= out_maxsize
+            )
+            if (depth > self.scale_up_depth
+                    and n_workers < self.max_workers
+                    and not downstream_busy):
+                self.add_worker()
+                self.decisions.append((now, 'up', self.n_workers, depth))
+            elif (depth == 0
+                    and utilization < self.scale_down_utilization
+                    and n_workers > self.min_workers):
+                self.retire_worker()
+                self.decisions.append((now, 'down', self.n_workers, depth))
+
+    def metrics(self) -> dict:
+        return dict(self.last_metrics, decisions=list(self.decisions))
+
+    def stop(self):
+        """ 감시를 멈추고, 남은 작업자들을 `stop_threads` 와 같은 방법으로 종료합니다.
+        """
+        self.event.set()
+        self.join()
+        for _ in range(self.n_workers):
+            self.retire_worker()
+        self.in_queue.join()
+        for worker in self.workers:
+            worker.join()
+
+
+def slow_resize(item):
+    time.sleep(0.005)
+    return item
+
+
+if __name__ == '__main__':
+    download_queue = BetterQueue(1000)
+    resize_queue = BetterQueue(1000)
+    upload_queue = BetterQueue(1000)
+    done_queue = BetterQueue()
+
+    # resize 단계만 다른 단계보다 5배 느리다.
+    supervisors = [
+        StageSupervisor(step1_download, download_queue, resize_queue),
+        StageSupervisor(slow_resize, resize_queue, upload_queue),
+        StageSupervisor(step3_upload, upload_queue, done_queue),
+    ]
+    for supervisor in supervisors:
+        supervisor.start()
+
+    colorprint('큐에 데이터 입력, 시간 측정 시작')
+    t_start = time.time()
+
+    for _ in range(2000):
+        download_queue.put(object())
+    # 입력이 끊긴 뒤 작업자가 줄어드는 모습을 보기 위해 잠시 기다린다.
+    while done_queue.qsize() < 2000:
+        time.sleep(0.01)
+    time.sleep(0.5)
+
+    names = ['download', 'resize', 'upload']
+    for name, supervisor in zip(names, supervisors):
+        supervisor.stop()
+        metrics = supervisor.metrics()
+        decisions = metrics.pop('decisions')
+        ups = sum(1 for d in decisions if d[1] == 'up')
+        downs = sum(1 for d in decisions if d[1] == 'down')
+        peak = max([d[2] for d in decisions] + [supervisor.min_workers])
+        print(f'{name:>8}: 작업자 증가 {ups}회, 감소 {downs}회, 최대 작업자 {peak}개')
+        print(f'{"":>8}  마지막 측정값 {metrics}')
+
+    t_end = time.time()
+    colorprint('모든 스레드들의 조인 완료, 시간 측정 끝')
+
+    print(f'{done_queue.qsize()} 개의 원소가 처리되었습니다.')
+    print(f'총 처리 시간은 {t_end-t_start:3f}초 입니다.')
@@ -0,0 +1,199 @@
+""" better way 55_1, 55_2 의 파이프라인 단계(download, resize, upload)는 모두 스레드에서 돈다.
+실제 resize 는 CPU 를 많이 쓰는 작업이라 GIL 때문에 여러 스레드를 띄워도 한 번에 하나씩만 실행된다.
+`ProcessStoppableWorker` 는 단계 함수를 프로세스 풀에서 실행하는 작업자다.
+1. `StoppableWorker` 를 상속받았으므로 `BetterQueue` 의 센티넬 종료 방법과 순회 방법을 그대로 따른다.
+   `start_threads`, `stop_threads` 로 시작하고 멈출 수 있어서, 스레드 단계와 프로세스 단계를 한 파이프라인에 섞을 수 있다.
+2. 큰 페이로드(바이트열)를 프로세스 사이에 피클링해서 주고받으면 직렬화와 복사 비용이 크다.
+   대신 페이로드를 `multiprocessing.shared_memory` 에 올리고, 공유 메모리의 이름과 크기만 담은
+   `SharedPayload` 핸들을 큐와 프로세스 사이에 주고받는다.
+3. 작업자 프로세스는 공유 메모리를 `memoryview` 로 열어 복사 없이 읽고, 결과를 새 공유 메모리에 써서 핸들을 돌려준다.
+   입력 페이로드는 결과를 받은 작업자가, 마지막 결과는 파이프라인의 끝에서 꺼낸 쪽이 해제(`unlink`)한다.
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from utils import colorprint
+from better_way_55_2 import (
+    BetterQueue,
+    StoppableWorker,
+    start_threads,
+    stop_threads,
+)
+
+
+class SharedPayload:
+    """ 공유 메모리에 올린 바이트열의 핸들입니다. 이름과 크기만 가지고 있어 피클링 비용이 거의 없다.
+    """
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+
+    @classmethod
+    def create(cls, data) -> 'SharedPayload':
+        size = len(data)
+        # 크기가 0인 공유 메모리는 만들 수 없다.
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        shm.buf[:size] = data
+        shm.close()
+        return cls(shm.name, size)
+
+    def read(self) -> bytes:
+        shm = shared_memory.SharedMemory(name=self.name)
+        try:
+            return bytes(shm.buf[:self.size])
+        finally:
+            shm.close()
+
+    def unlink(self):
+        shm = shared_memory.SharedMemory(name=self.name)
+        shm.close()
+        shm.unlink()
+
+
+def run_in_process(func, payload: SharedPayload) -> SharedPayload:
+    """ 작업자 프로세스에서 실행됩니다.
+    입력 페이로드를 복사하지 않고 `memoryview` 로 `func` 에 넘기고, 결과를 새 공유 메모리에 올린다.
+    """
+    shm = shared_memory.SharedMemory(name=payload.name)
+    view = shm.buf[:payload.size]
+    try:
+        result = func(view)
+        out = SharedPayload.create(result)
+        del result
+    finally:
+        view.release()
+        shm.close()
+    return out
+
+
+class ProcessStoppableWorker(StoppableWorker):
+    """ `func` 을 `pool` 의 프로세스에서 실행하는 작업자입니다.
+    `func` 은 `memoryview` 를 받아 바이트열(처럼 쓸 수 있는 객체)을 돌려주는 최상위 함수여야 한다.
+    입력 큐에서 바이트열을 받으면 공유 메모리에 올린 뒤 넘기고, `SharedPayload` 를 받으면 그대로 넘긴다.
+    """
+    def __init__(self, func, in_queue, out_queue, pool: ProcessPoolExecutor):
+        super().__init__(func, in_queue, out_queue)
+        self.pool = pool
+
+    def run(self):
+        for item in self.in_queue:
+            if not isinstance(item, SharedPayload):
+                item = SharedPayload.create(item)
+            # 작업 하나를 제출하고 결과를 기다리는 동안 이 스레드는 GIL 을 놓고 쉰다.
+            future = self.pool.submit(run_in_process, self.func, item)
+            try:
+                result = future.result()
+            finally:
+                item.unlink()
+            self.out_queue.put(result)
+
+
+def start_process_workers(count, func, in_queue, out_queue, pool):
+    # `start_threads` 와 같은 모양이다. 멈출 때도 `stop_threads` 를 그대로 사용한다.
+    workers = [
+        ProcessStoppableWorker(func, in_queue, out_queue, pool)
+        for _ in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+PAYLOAD_SIZE = 1 << 20
+
+
+def download(item) -> SharedPayload:
+    # 다운로드한 데이터를 처음부터 공유 메모리에 쓴다.
+    time.sleep(0.001)
+    return SharedPayload.create(os.urandom(PAYLOAD_SIZE))
+
+
+def download_bytes(item) -> bytes:
+    time.sleep(0.001)
+    return os.urandom(PAYLOAD_SIZE)
+
+
+def resize(data) -> bytes:
+    """ CPU 를 많이 쓰는 가짜 resize. 4바이트마다 평균을 내서 크기를 1/4 로 줄인다.
+    """
+    data = memoryview(data).cast('B')
+    out = bytearray(len(data) // 4)
+    for i in range(len(out)):
+        j = i * 4
+        out[i] = (data[j] + data[j + 1] + data[j + 2] + data[j + 3]) >> 2
+    return out
+
+
+def upload(item) -> int:
+    time.sleep(0.001)
+    if isinstance(item, SharedPayload):
+        size = item.size
+        item.unlink()
+        return size
+    return len(item)
+
+
+def run_pipeline(n_item, resize_stage):
+    download_queue = BetterQueue(10)
+    resize_queue = BetterQueue(10)
+    upload_queue = BetterQueue(10)
+    done_queue = BetterQueue()
+
+    if resize_stage == 'thread':
+        download_threads = start_threads(
+            4, download_bytes, download_queue, resize_queue)
+        resize_threads = start_threads(
+            4, resize, resize_queue, upload_queue)
+        upload_threads = start_threads(
+            4, upload, upload_queue, done_queue)
+        pool = None
+    else:
+        # 스레드가 이미 돌고 있는 프로세스를 fork 하면, 다른 스레드가 잡고 있던 락이
+        # 자식 프로세스에 잠긴 채로 복사되어 교착 상태에 빠질 수 있다. 그래서 spawn 을 사용한다.
+        pool = ProcessPoolExecutor(
+            max_workers=4,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+        # 프로세스를 띄우는 시간은 측정하지 않도록 미리 띄워 둔다.
+        list(pool.map(abs, range(4)))
+        if resize_stage == 'process':
+            download_threads = start_threads(
+                4, download, download_queue, resize_queue)
+            resize_threads = start_process_workers(
+                4, resize, resize_queue, upload_queue, pool)
+        else:
+            # 공유 메모리 없이 바이트열을 그대로 피클링해서 프로세스에 넘긴다.
+            download_threads = start_threads(
+                4, download_bytes, download_queue, resize_queue)
+            resize_threads = start_threads(
+                4, lambda data: pool.submit(resize, data).result(),
+                resize_queue, upload_queue)
+        upload_threads = start_threads(
+            4, upload, upload_queue, done_queue)
+
+    t_start = time.time()
+    for _ in range(n_item):
+        download_queue.put(object())
+
+    stop_threads(download_queue, download_threads)
+    stop_threads(resize_queue, resize_threads)
+    stop_threads(upload_queue, upload_threads)
+    t_end = time.time()
+
+    if pool is not None:
+        pool.shutdown()
+    assert done_queue.qsize() == n_item
+    return t_end - t_start
+
+
+if __name__ == '__main__':
+    n_item = 40
+    colorprint(f'resize 단계의 실행 방식에 따른 처리 시간 ({n_item}개, 아이템당 {PAYLOAD_SIZE >> 20}MiB, '
+               f'CPU {os.cpu_count()}개)')
+    for resize_stage in ('thread', 'pickle', 'process'):
+        elapsed = run_pipeline(n_item, resize_stage)
+        print(f'{resize_stage:>8}: {elapsed:.3f}초')
@@ -0,0 +1,238 @@
+""" better way 55_2 의 파이프라인은 중간 큐의 크기를 1000개로 고정해 두었고, 마지막 `done_queue` 는 크기 제한이 없다.
+아이템의 크기가 제각각이면 "1000개" 라는 제한은 메모리 사용량을 거의 제한하지 못한다.
+입력이 한꺼번에 몰리면(burst) 메모리가 끝없이 늘어날 수 있다.
+1. `BudgetedQueue` 는 아이템 개수뿐 아니라 아이템의 바이트 크기 합으로도 크기를 제한한다.
+   바이트 예산을 넘으면 `put` 이 기다린다. 이 대기가 앞 단계로 차례차례 전달되는 것이 역압(backpressure)이다.
+2. `MemoryBudget` 은 파이프라인의 모든 큐에 들어 있는 바이트 수의 합을 센다.
+   합이 상한을 넘으면 생산자(파이프라인에 데이터를 넣는 쪽)가 `wait_for_room` 에서 기다린다.
+   중간 단계는 기다리게 하지 않는다. 중간 단계까지 기다리게 하면 서로를 기다리는 교착 상태가 생길 수 있다.
+3. 큐마다 아이템 수와 바이트 수의 최고 수위(high-water mark)를 기록한다.
+"""
+
+import os
+import sys
+import time
+import resource
+from queue import Full
+from threading import Thread, Condition
+
+from utils import colorprint
+from better_way_55_1 import (
+    step1_download,
+    step2_resize,
+)
+from better_way_55_2 import BetterQueue, start_threads, stop_threads
+
+
+def payload_size(item) -> int:
+    """ 바이트열처럼 길이가 곧 크기인 아이템은 길이를, 그 밖의 아이템은 `sys.getsizeof` 를 사용합니다.
+    """
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        return len(item)
+    return sys.getsizeof(item)
+
+
+class MemoryBudget:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.high_water = 0
+        self.throttled = 0 # 생산자가 기다려야 했던 횟수
+        self.condition = Condition()
+
+    def add(self, n: int):
+        with self.condition:
+            self.used += n
+            self.high_water = max(self.high_water, self.used)
+
+    def release(self, n: int):
+        with self.condition:
+            self.used -= n
+            self.condition.notify_all()
+
+    def wait_for_room(self, n: int, timeout: float = None) -> bool:
+        """ `n` 바이트를 더 넣어도 상한을 넘지 않을 때까지 기다립니다.
+        파이프라인이 비어 있으면 상한보다 큰 아이템이라도 들여보낸다.
+        """
+        with self.condition:
+            def has_room():
+                return self.used == 0 or self.used + n <= self.max_bytes
+            if has_room():
+                return True
+            self.throttled += 1
+            return self.condition.wait_for(has_room, timeout)
+
+
+class BudgetedQueue(BetterQueue):
+    def __init__(
+        self,
+        maxsize: int = 0,
+        max_bytes: int = 0,
+        budget: MemoryBudget = None,
+        sizeof=payload_size,
+    ):
+        super().__init__(maxsize)
+        self.max_bytes = max_bytes
+        self.budget = budget
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.high_water_items = 0
+        self.high_water_bytes = 0
+
+    def put(self, item, block=True, timeout=None):
+        size = 0 if item is self.SENTINEL else self.sizeof(item)
+        with self.not_full:
+            def has_room():
+                if self.maxsize > 0 and self._qsize() >= self.maxsize:
+                    return False
+                # 큐가 비어 있으면 예산보다 큰 아이템이라도 받는다. 그렇지 않으면 영원히 기다리게 된다.
+                if self.max_bytes > 0 and self.nbytes > 0:
+                    return self.nbytes + size <= self.max_bytes
+                return True
+
+            if not has_room():
+                if not block:
+                    raise Full
+                if not self.not_full.wait_for(has_room, timeout):
+                    raise Full
+            self._put(item)
+            self.nbytes += size
+            self.unfinished_tasks += 1
+            self.high_water_items = max(self.high_water_items, self._qsize())
+            self.high_water_bytes = max(self.high_water_bytes, self.nbytes)
+            self.not_empty.notify()
+        if self.budget is not None:
+            self.budget.add(size)
+
+    def put_many(self, items):
+        # 아이템마다 바이트 예산을 확인해야 하므로 하나씩 넣는다.
+        for item in items:
+            self.put(item)
+
+    def _get(self):
+        item = super()._get()
+        size = 0 if item is self.SENTINEL else self.sizeof(item)
+        self.nbytes -= size
+        # 바이트 수가 줄었으므로 기다리는 생산자를 모두 깨워 다시 확인하게 한다.
+        self.not_full.notify_all()
+        if self.budget is not None:
+            self.budget.release(size)
+        return item
+
+    def stats(self) -> dict:
+        return {
+            'high_water_items': self.high_water_items,
+            'high_water_bytes': self.high_water_bytes,
+        }
+
+
+def current_rss() -> int:
+    """ 현재 프로세스의 상주 메모리(RSS) 크기(바이트)를 반환합니다.
+    `/proc` 가 없는 운영 체제에서는 지금까지의 최대 RSS 를 대신 반환한다.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler(Thread):
+    def __init__(self, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            self.peak = max(self.peak, current_rss())
+            time.sleep(self.interval)
+
+    def stop(self) -> int:
+        self.running = False
+        self.join()
+        return self.peak
+
+
+def slow_upload(item):
+    # 업로드가 입력보다 느려서 앞 단계의 큐에 아이템이 쌓이는 상황을 흉내 낸다.
+    time.sleep(0.01)
+    return item
+
+
+def drain(queue: BetterQueue, counter: list):
+    for item in queue:
+        counter[0] += 1
+
+
+def run_pipeline(n_item, item_size, budgeted):
+    if budgeted:
+        budget = MemoryBudget(max_bytes=8 * item_size)
+        queues = [
+            BudgetedQueue(1000, max_bytes=4 * item_size, budget=budget)
+            for _ in range(4)
+        ]
+    else:
+        budget = None
+        queues = [BetterQueue(1000) for _ in range(3)] + [BetterQueue()]
+    download_queue, resize_queue, upload_queue, done_queue = queues
+
+    download_threads = start_threads(
+        4, step1_download, download_queue, resize_queue)
+    resize_threads = start_threads(
+        4, step2_resize, resize_queue, upload_queue)
+    upload_threads = start_threads(
+        4, slow_upload, upload_queue, done_queue)
+    # `done_queue` 도 소비자가 있어야 비워진다.
+    counter = [0]
+    drain_thread = Thread(target=drain, args=(done_queue, counter))
+    drain_thread.start()
+
+    rss_before = current_rss()
+    sampler = RssSampler()
+    sampler.start()
+    t_start = time.time()
+
+    for _ in range(n_item):
+        item = os.urandom(item_size)
+        if budget is not None:
+            budget.wait_for_room(len(item))
+        download_queue.put(item)
+        del item
+
+    stop_threads(download_queue, download_threads)
+    stop_threads(resize_queue, resize_threads)
+    stop_threads(upload_queue, upload_threads)
+    done_queue.close()
+    drain_thread.join()
+
+    t_end = time.time()
+    peak = sampler.stop()
+    assert counter[0] == n_item
+    return t_end - t_start, peak - rss_before, queues, budget
+
+
+if __name__ == '__main__':
+    item_size = 1 << 18 # 256KiB
+    for budgeted in (False, True):
+        name = '예산 있는 큐' if budgeted else '예산 없는 큐'
+        for n_item in (100, 1000):
+            elapsed, rss, queues, budget = run_pipeline(
+                n_item, item_size, budgeted)
+            colorprint(f'{name}, {n_item}개 입력: {elapsed:.2f}초, '
+                       f'최대 RSS 증가량 {rss / 2**20:.1f}MiB')
+            if budgeted:
+                for queue_name, queue in zip(
+                        ('download', 'resize', 'upload', 'done'), queues):
+                    stats = queue.stats()
+                    print(f'{queue_name:>8}: 최고 수위 '
+                          f'{stats["high_water_items"]}개, '
+                          f'{stats["high_water_bytes"] / 2**20:.2f}MiB')
+                print(f'파이프라인 전체 최고 수위 {budget.high_water / 2**20:.2f}MiB, '
+                      f'생산자 대기 {budget.throttled}회')
+
+# 예산 없는 큐는 입력 수에 비례해 최대 RSS 가 늘어난다. (1000개 입력에서 100MiB 이상)
+# 예산 있는 큐는 입력 수와 관계없이 최대 RSS 가 거의 같고, 처리 시간도 거의 차이가 없다.
+# 전체 최고 수위가 `MemoryBudget` 의 상한을 조금 넘을 수 있는데, 중간 단계는 전체 예산을 기다리지 않기 때문이다.
+# 넘는 양은 각 단계에서 처리 중인 아이템 수 만큼으로 제한된다.
@@ -12,31 +12,50 @@ from utils import colorprint
 ALIVE = '*'
 EMPTY = '_'
 
+class ListStorage:
+    """ 셀 상태를 한 글자짜리 문자열의 리스트의 리스트로 저장하는 기본 저장소입니다.
+    다른 저장소(better_way_56_1)도 `get`, `set`, `row` 메서드만 구현하면 `Grid` 에 꽂아 쓸 수 있다.
+    """
+    def __init__(self, height: int, width: int):
+        self.rows = []
+        for _ in range(height):
+            self.rows.append([EMPTY] * width)
+
+    def get(self, y, x):
+        return self.rows[y][x]
+
+    def set(self, y, x, state):
+        self.rows[y][x] = state
+
+    def row(self, y) -> str:
+        return ''.join(self.rows[y])
+
+
 class Grid:
     def __init__(
         self, /, *,
         width: int = 0,
         height: int = 0,
+        storage: typing.Callable = ListStorage,
     ):
         assert width > 0 and height > 0
         self.width = width
         self.height = height
-        self.rows = []
-        for _ in range(self.height):
-            self.rows.append([EMPTY] * self.width)
+        # `storage` 는 (height, width) 를 받아 저장소 객체를 만드는 호출 가능 객체다.
+        # 좌표를 감싸는(modulo) 일은 그리드가, 실제로 값을 담는 일은 저장소가 맡는다.
+        self.storage = storage(height, width)
 
     def get(self, y, x):
-        return self.rows[y % self.height][x % self.width]
+        return self.storage.get(y % self.height, x % self.width)
 
     def set(self, y, x, state):
         assert state in [ALIVE, EMPTY]
-        self.rows[y % self.height][x % self.width] = state
+        self.storage.set(y % self.height, x % self.width, state)
 
     def __str__(self) -> str:
         lines = []
-        for row in self.rows:
-            line = ''.join(row)
-            lines.append(line)
+        for y in range(self.height):
+            lines.append(self.storage.row(y))
         return '\n'.join(lines)
 
 
@@ -105,7 +124,8 @@ def step_cell(
 
 def simulate(grid: Grid) -> Grid:
     h, w = grid.height, grid.width
-    next_grid = Grid(width=w, height=h)
+    # 다음 세대의 그리드도 현재 그리드와 같은 저장소를 사용한다.
+    next_grid = Grid(width=w, height=h, storage=type(grid.storage))
     for y in range(h):
         for x in range(w):
             step_cell(y, x, grid.get, next_grid.set)
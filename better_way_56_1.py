@@ -0,0 +1,173 @@
+""" better way 56 의 `Grid` 는 셀 하나를 한 글자짜리 문자열로, 그것도 리스트의 리스트에 담는다.
+리스트의 원소는 실제로는 문자열 객체를 가리키는 포인터(8바이트)이므로,
+10000 x 10000 크기의 그리드라면 포인터만으로도 800MB 가 넘는 메모리를 차지한다.
+셀의 상태는 살았거나(`ALIVE`) 죽었거나(`EMPTY`) 둘 중 하나이므로 1비트면 충분하다.
+`Grid` 의 `storage` 파라미터에 아래 저장소를 넘기면 `get`, `set`, `__str__` 은 그대로 두고
+메모리 사용량만 줄일 수 있다.
+1. `NumpyStorage` 는 셀 하나를 1바이트(uint8)로 저장한다. 리스트 저장소보다 약 8배 작다.
+2. `BitPackedStorage` 는 1바이트에 셀 8개를 저장한다. 리스트 저장소보다 약 64배 작다.
+3. `grid_to_array`, `array_to_grid` 는 그리드를 NumPy 배열로 바꾸거나 되돌린다.
+   기본 저장소(`ListStorage`)는 셀을 하나씩 `get`/`set` 하지 않고, 행들을 한 문자열로 이어 붙여 바이트 배열로 한꺼번에 바꾼다.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from better_way_56 import Grid, ListStorage, ALIVE, EMPTY, simulate
+from utils import colorprint
+
+
+class NumpyStorage:
+    """ 셀 상태를 (height, width) 모양의 uint8 배열에 0 또는 1로 저장합니다.
+    """
+    def __init__(self, height: int, width: int):
+        self.cells = np.zeros((height, width), dtype=np.uint8)
+
+    def get(self, y, x):
+        return ALIVE if self.cells[y, x] else EMPTY
+
+    def set(self, y, x, state):
+        self.cells[y, x] = state == ALIVE
+
+    def row(self, y) -> str:
+        return ''.join(ALIVE if cell else EMPTY for cell in self.cells[y])
+
+    def to_array(self) -> np.ndarray:
+        return self.cells.copy()
+
+    def load_array(self, cells: np.ndarray) -> None:
+        self.cells[...] = cells != 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.cells.nbytes
+
+
+class BitPackedStorage:
+    """ 셀 상태를 비트 단위로 `bytearray` 에 저장합니다.
+    한 행은 `(width + 7) // 8` 바이트를 차지하며, x 번째 셀은
+    `x // 8` 번째 바이트의 `x % 8` 번째 비트(리틀 엔디언 비트 순서)에 놓인다.
+    """
+    def __init__(self, height: int, width: int):
+        self.width = width
+        self.stride = (width + 7) // 8
+        self.bits = bytearray(self.stride * height)
+
+    def get(self, y, x):
+        byte = self.bits[y * self.stride + (x >> 3)]
+        return ALIVE if (byte >> (x & 7)) & 1 else EMPTY
+
+    def set(self, y, x, state):
+        i = y * self.stride + (x >> 3)
+        mask = 1 << (x & 7)
+        if state == ALIVE:
+            self.bits[i] |= mask
+        else:
+            self.bits[i] &= ~mask
+
+    def row(self, y) -> str:
+        return ''.join(self.get(y, x) for x in range(self.width))
+
+    def to_array(self) -> np.ndarray:
+        packed = np.frombuffer(self.bits, dtype=np.uint8)
+        packed = packed.reshape(-1, self.stride)
+        cells = np.unpackbits(packed, axis=1, bitorder='little')
+        return cells[:, :self.width]
+
+    def load_array(self, cells: np.ndarray) -> None:
+        packed = np.packbits(cells != 0, axis=1, bitorder='little')
+        self.bits[:] = packed.tobytes()
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+
+# `ALIVE`, `EMPTY` 는 한 글자짜리 ASCII 문자열이므로 한 바이트로 바꿀 수 있다.
+STATE_BYTES = np.frombuffer((EMPTY + ALIVE).encode('ascii'), dtype=np.uint8)
+
+
+def list_storage_to_array(storage: ListStorage) -> np.ndarray:
+    height, width = len(storage.rows), len(storage.rows[0])
+    text = ''.join(map(''.join, storage.rows)).encode('ascii')
+    cells = np.frombuffer(text, dtype=np.uint8) == STATE_BYTES[1]
+    return cells.reshape(height, width).astype(np.uint8)
+
+
+def load_list_storage(storage: ListStorage, cells: np.ndarray) -> None:
+    width = cells.shape[1]
+    text = STATE_BYTES[(cells != 0).astype(np.uint8)].tobytes().decode('ascii')
+    # 한 글자짜리 문자열은 파이썬이 미리 만들어 두고 공유하므로, 셀마다 새 문자열이 생기지 않는다.
+    storage.rows = [
+        list(text[i:i + width]) for i in range(0, len(text), width)]
+
+
+def grid_to_array(grid: Grid) -> np.ndarray:
+    """ 그리드의 셀 상태를 (height, width) 모양의 uint8 배열(살아 있으면 1)로 복사합니다.
+    """
+    storage = grid.storage
+    if hasattr(storage, 'to_array'):
+        return storage.to_array()
+    if type(storage) is ListStorage:
+        return list_storage_to_array(storage)
+    cells = np.zeros((grid.height, grid.width), dtype=np.uint8)
+    for y in range(grid.height):
+        for x in range(grid.width):
+            cells[y, x] = grid.get(y, x) == ALIVE
+    return cells
+
+
+def array_to_grid(cells: np.ndarray, storage=ListStorage) -> Grid:
+    """ `grid_to_array` 의 역변환입니다. 0이 아닌 원소는 `ALIVE` 가 된다.
+    """
+    height, width = cells.shape
+    grid = Grid(width=width, height=height, storage=storage)
+    if hasattr(grid.storage, 'load_array'):
+        grid.storage.load_array(cells)
+        return grid
+    if type(grid.storage) is ListStorage:
+        load_list_storage(grid.storage, cells)
+        return grid
+    for y, x in zip(*np.nonzero(cells)):
+        grid.set(int(y), int(x), ALIVE)
+    return grid
+
+
+def storage_nbytes(grid: Grid) -> int:
+    """ 그리드의 저장소가 셀 상태를 담기 위해 사용하는 대략적인 바이트 수를 반환합니다.
+    """
+    storage = grid.storage
+    if isinstance(storage, ListStorage):
+        # 셀 문자열(`ALIVE`, `EMPTY`)은 인터닝되어 공유되므로 포인터 크기만 센다.
+        return sum(sys.getsizeof(row) for row in storage.rows)
+    return storage.nbytes
+
+
+if __name__ == '__main__':
+    colorprint('저장소별 메모리 사용량 (1000 x 1000)')
+    for storage in (ListStorage, NumpyStorage, BitPackedStorage):
+        big = Grid(width=1000, height=1000, storage=storage)
+        print(f'{storage.__name__:>16}: {storage_nbytes(big):>10,} 바이트')
+
+    for storage in (ListStorage, NumpyStorage, BitPackedStorage):
+        grid = Grid(width=5, height=5, storage=storage)
+        grid.set(0, 3, ALIVE)
+        grid.set(1, 4, ALIVE)
+        grid.set(2, 2, ALIVE)
+        grid.set(2, 3, ALIVE)
+        grid.set(2, 4, ALIVE)
+
+        colorprint(f'게임 시작 ({storage.__name__})')
+        s = time.time()
+        print(grid)
+
+        # `simulate` 는 저장소가 무엇인지 신경쓰지 않는다.
+        for i in range(5):
+            grid = simulate(grid)
+            print('..')
+            print(grid)
+
+        e = time.time()
+        colorprint(f'게임 끝, {e-s:.2f}초 소요됨.')
@@ -0,0 +1,105 @@
+""" better way 56 의 `simulate` 는 셀 하나마다 `step_cell` -> `count_neighbors` -> `get` 8번,
+그리고 `game_logic` 까지 파이썬 함수를 10번 남짓 호출한다. 셀이 100만 개라면 한 세대에 천만 번이다.
+그리드 전체를 하나의 배열로 보고, 모든 셀의 이웃 수를 한꺼번에 계산하면 이 호출들이 모두 사라진다.
+1. `np.roll` 로 배열을 위/아래/왼쪽/오른쪽으로 밀어서 더하면 토러스(가장자리가 반대편과 이어진) 형태의
+   이웃 수를 얻는다. `Grid.get` 이 좌표에 modulo 를 취하는 것과 같은 효과다.
+2. `game_logic` 의 규칙은 배열 마스크로 옮긴다.
+   - 살아 있는 셀은 이웃이 2개 또는 3개일 때만 살아남는다.
+   - 죽은 셀은 이웃이 정확히 3개일 때 살아난다.
+"""
+
+import time
+
+import numpy as np
+
+from better_way_56 import (
+    Grid,
+    ALIVE,
+    count_neighbors,
+    game_logic,
+    simulate,
+)
+from better_way_56_1 import NumpyStorage, grid_to_array, array_to_grid
+from utils import colorprint
+
+
+def count_neighbors_array(cells: np.ndarray) -> np.ndarray:
+    """ 모든 셀에 대해 살아 있는 이웃의 수를 한꺼번에 계산합니다.
+    가로 방향으로 먼저 세 칸을 더한 뒤, 그 결과를 세로 방향으로 세 칸 더하면
+    3x3 합을 `np.roll` 네 번으로 구할 수 있다. 자기 자신은 마지막에 뺀다.
+    """
+    row_sum = cells + np.roll(cells, 1, axis=1) + np.roll(cells, -1, axis=1)
+    box_sum = row_sum + np.roll(row_sum, 1, axis=0) + np.roll(row_sum, -1, axis=0)
+    return box_sum - cells
+
+
+def step_array(cells: np.ndarray) -> np.ndarray:
+    """ `game_logic` 과 같은 규칙으로 다음 세대의 배열을 만듭니다.
+    """
+    neighbors = count_neighbors_array(cells)
+    alive = cells != 0
+    survive = alive & ((neighbors == 2) | (neighbors == 3))
+    born = ~alive & (neighbors == 3)
+    return (survive | born).astype(np.uint8)
+
+
+def simulate_vectorized(grid: Grid) -> Grid:
+    cells = grid_to_array(grid)
+    # 다음 세대의 그리드도 현재 그리드와 같은 저장소를 사용한다.
+    return array_to_grid(step_array(cells), storage=type(grid.storage))
+
+
+def simulate_python(grid: Grid) -> Grid:
+    """ `simulate` 와 같은 셀 단위 구현이지만 `game_logic` 의 I/O 블로킹을 뺀 버전입니다.
+    순수한 계산 비용만 비교하기 위해 사용한다.
+    """
+    h, w = grid.height, grid.width
+    next_grid = Grid(width=w, height=h, storage=type(grid.storage))
+    for y in range(h):
+        for x in range(w):
+            state = grid.get(y, x)
+            neighbors = count_neighbors(y, x, grid.get)
+            next_grid.set(y, x, game_logic(state, neighbors, io_blocking_time=0))
+    return next_grid
+
+
+if __name__ == '__main__':
+    grid = Grid(width=5, height=5)
+    grid.set(0, 3, ALIVE)
+    grid.set(1, 4, ALIVE)
+    grid.set(2, 2, ALIVE)
+    grid.set(2, 3, ALIVE)
+    grid.set(2, 4, ALIVE)
+
+    colorprint('`simulate` 와 `simulate_vectorized` 의 결과 비교')
+    expected, found = grid, grid
+    for i in range(5):
+        expected = simulate(expected)
+        found = simulate_vectorized(found)
+        assert str(expected) == str(found)
+    print(found)
+    print('5세대 모두 결과가 같습니다.')
+
+    # 같은 1000 x 1000 그리드로 `simulate_vectorized` 호출 전체(배열 변환 포함)의 시간을 잰다.
+    colorprint('1000 x 1000 그리드 한 세대 소요 시간 비교 (I/O 블로킹 제외)')
+    rng = np.random.default_rng(56)
+    cells = rng.integers(0, 2, (1000, 1000), dtype=np.uint8)
+    grid = array_to_grid(cells)
+    numpy_grid = array_to_grid(cells, storage=NumpyStorage)
+
+    s = time.perf_counter()
+    expected = simulate_python(grid)
+    python_time = time.perf_counter() - s
+    print(f'셀 단위 (`ListStorage`): {python_time:.3f}초')
+
+    for name, target in [('ListStorage', grid), ('NumpyStorage', numpy_grid)]:
+        elapsed = float('inf')
+        for _ in range(5):
+            s = time.perf_counter()
+            found = simulate_vectorized(target)
+            elapsed = min(elapsed, time.perf_counter() - s)
+        assert (grid_to_array(found) == grid_to_array(expected)).all()
+        print(f'배열 단위 (`{name}`): {elapsed:.3f}초, 약 {python_time / elapsed:.0f}배 빠릅니다.')
+
+# `ListStorage` 는 그리드와 배열 사이를 오가는 변환(행마다 문자열 잇기, 바이트 배열 만들기)이 시간의 대부분을 차지한다.
+# `NumpyStorage` 는 배열을 복사하기만 하면 되므로 변환 비용이 거의 없다.
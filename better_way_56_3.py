@@ -0,0 +1,131 @@
+""" 실제 생명 게임 그리드는 대부분의 셀이 비어(`EMPTY`) 있다.
+그런데도 better way 56 의 `simulate` 는 매 세대마다 `width * height` 개의 셀을 모두 방문한다.
+어떤 셀과 그 이웃 8칸이 지난 세대와 똑같다면, 그 셀의 다음 상태도 지난번에 계산한 결과(=지금 상태)와 같다.
+따라서 지난 세대에 상태가 바뀐 셀(더러운 셀)과 그 이웃만 다시 계산하면 된다.
+1. `SparseGrid` 는 살아 있는 셀의 좌표 집합과, 직전 세대에 바뀐 셀의 좌표 집합만 가지고 있다.
+2. 한 세대를 계산하는 비용은 그리드 넓이가 아니라 바뀐(살아 있는) 셀의 수에 비례한다.
+3. `from_grid`, `to_grid` 로 `Grid` 와 오갈 수 있으며, 변환 과정에서 잃어버리는 정보는 없다.
+"""
+
+import time
+
+from better_way_56 import Grid, ListStorage, ALIVE, EMPTY, game_logic, simulate
+from utils import colorprint
+
+
+NEIGHBOR_OFFSETS = (
+    (-1, 0), (-1, 1), (0, 1), (1, 1),
+    (1, 0), (1, -1), (0, -1), (-1, -1),
+)
+
+
+class SparseGrid:
+    """ 살아 있는 셀의 좌표만 저장하는 그리드입니다.
+    `dirty` 에는 직전 세대에 상태가 바뀐 셀들이 들어 있다.
+    """
+    def __init__(
+        self, /, *,
+        width: int = 0,
+        height: int = 0,
+    ):
+        assert width > 0 and height > 0
+        self.width = width
+        self.height = height
+        self.live = set()
+        self.dirty = set()
+
+    def get(self, y, x):
+        if (y % self.height, x % self.width) in self.live:
+            return ALIVE
+        return EMPTY
+
+    def set(self, y, x, state):
+        assert state in [ALIVE, EMPTY]
+        cell = (y % self.height, x % self.width)
+        if state == ALIVE:
+            if cell not in self.live:
+                self.live.add(cell)
+                self.dirty.add(cell)
+        elif cell in self.live:
+            self.live.remove(cell)
+            self.dirty.add(cell)
+
+    def neighbors(self, y, x):
+        h, w = self.height, self.width
+        for dy, dx in NEIGHBOR_OFFSETS:
+            yield ((y + dy) % h, (x + dx) % w)
+
+    def __str__(self) -> str:
+        lines = []
+        for y in range(self.height):
+            line = ''.join(self.get(y, x) for x in range(self.width))
+            lines.append(line)
+        return '\n'.join(lines)
+
+    @classmethod
+    def from_grid(cls, grid: Grid) -> 'SparseGrid':
+        sparse = cls(width=grid.width, height=grid.height)
+        for y in range(grid.height):
+            for x in range(grid.width):
+                if grid.get(y, x) == ALIVE:
+                    sparse.set(y, x, ALIVE)
+        return sparse
+
+    def to_grid(self, storage=ListStorage) -> Grid:
+        grid = Grid(width=self.width, height=self.height, storage=storage)
+        for y, x in self.live:
+            grid.set(y, x, ALIVE)
+        return grid
+
+
+def simulate_sparse(grid: SparseGrid) -> SparseGrid:
+    # 바뀐 셀과 그 이웃들만이 다음 세대에 바뀔 가능성이 있는 후보다.
+    candidates = set(grid.dirty)
+    for y, x in grid.dirty:
+        candidates.update(grid.neighbors(y, x))
+
+    next_grid = SparseGrid(width=grid.width, height=grid.height)
+    # 후보가 아닌 셀은 상태가 그대로이므로 살아 있는 셀 집합을 통째로 복사해 두고,
+    # 후보 셀만 다시 계산해서 바뀐 부분을 반영한다.
+    next_grid.live = set(grid.live)
+    live = grid.live
+    for cell in candidates:
+        state = ALIVE if cell in live else EMPTY
+        neighbors = 0
+        for neighbor in grid.neighbors(*cell):
+            if neighbor in live:
+                neighbors += 1
+        next_state = game_logic(state, neighbors, io_blocking_time=0)
+        if next_state != state:
+            next_grid.set(*cell, next_state)
+    return next_grid
+
+
+if __name__ == '__main__':
+    grid = Grid(width=5, height=5)
+    grid.set(0, 3, ALIVE)
+    grid.set(1, 4, ALIVE)
+    grid.set(2, 2, ALIVE)
+    grid.set(2, 3, ALIVE)
+    grid.set(2, 4, ALIVE)
+
+    colorprint('`simulate` 와 `simulate_sparse` 의 결과 비교')
+    expected, sparse = grid, SparseGrid.from_grid(grid)
+    for i in range(5):
+        expected = simulate(expected)
+        sparse = simulate_sparse(sparse)
+        assert str(expected) == str(sparse.to_grid())
+    print(sparse)
+    print('5세대 모두 결과가 같습니다.')
+
+    # 글라이더 하나는 그리드가 아무리 커져도 살아 있는 셀이 5개뿐이다.
+    colorprint('그리드 크기에 따른 100세대 소요 시간 (글라이더 1개)')
+    for size in (100, 1000, 10000):
+        sparse = SparseGrid(width=size, height=size)
+        for y, x in ((0, 1), (1, 2), (2, 0), (2, 1), (2, 2)):
+            sparse.set(y, x, ALIVE)
+        s = time.perf_counter()
+        for _ in range(100):
+            sparse = simulate_sparse(sparse)
+        e = time.perf_counter()
+        print(f'{size:>5} x {size:<5}: {e-s:.4f}초, 살아 있는 셀 {len(sparse.live)}개')
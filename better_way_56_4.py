@@ -0,0 +1,312 @@
+""" 100만 세대 뒤의 그리드가 필요하다면 한 세대씩 계산하는 방법(`simulate`, `simulate_threaded`,
+`simulate_pool`, `simulate_pipeline`, 코루틴 `simulate`)으로는 답이 없다.
+해시라이프(Hashlife) 알고리즘은 공간과 시간을 함께 압축한다.
+1. 그리드를 쿼드트리로 표현한다. 한 변이 2^k 인 노드는 한 변이 2^(k-1) 인 자식 노드 4개로 이루어진다.
+2. 내용이 같은 노드는 해시 테이블(정규화 테이블)을 통해 단 하나의 객체만 만든다.
+   빈 공간이나 반복되는 무늬는 자연스럽게 공유된다.
+3. 한 변이 2^k 인 노드가 주어지면, 바깥의 영향을 받지 않고 확정할 수 있는 가운데 2^(k-1) 영역의
+   2^(k-2) 세대 뒤 결과를 계산할 수 있다. 이 결과를 노드에 메모이제이션해 두면,
+   같은 노드를 다시 만났을 때 계산 없이 결과를 재사용할 수 있다.
+better way 56 의 그리드는 가장자리가 반대편과 이어진 토러스다. 토러스 위의 N 세대 뒤 결과는
+그리드를 무한한 평면에 바둑판처럼 반복해서 깔아 두고 N 세대를 진행한 결과의 한 조각과 같다.
+정규화 테이블은 크기 제한(`max_nodes`)이 있다. `advance` 를 시작할 때 테이블이 `max_nodes` 를 넘었으면
+테이블과 모든 메모이제이션 결과를 한꺼번에 버린다(`collect`). 버려진 노드는 다시 만들어질 수 있을 뿐 결과가 틀려지지는 않는다.
+`successor` 를 계산하는 도중에는 노드를 버리지 않는다. 계산 중에 노드를 하나씩 버리면 다른 노드가 아직 참조하는 노드의
+결과까지 잃어버려서 같은 계산을 끝없이 되풀이하게 된다. 그래서 `advance` 한 번이 쓰는 동안에는 테이블이 `max_nodes` 를 넘을 수 있다.
+노드들은 서로를 자식과 결과(`next`)로 참조하므로, 일부만 골라 버려서는 메모리가 줄지 않는다. 전부 버려야 확실히 돌려받는다.
+"""
+
+import time
+
+from better_way_56 import Grid, ListStorage, ALIVE, EMPTY, game_logic, simulate
+from utils import colorprint
+
+
+class Node:
+    """ 쿼드트리의 노드입니다. `level` 이 k 이면 한 변이 2^k 인 정사각형을 나타낸다.
+    `next` 에는 j 를 키로 2^j 세대 뒤의 가운데 영역(`successor`)을 저장한다.
+    """
+    __slots__ = ('level', 'nw', 'ne', 'sw', 'se', 'population', 'next')
+
+    def __init__(self, level, nw, ne, sw, se, population):
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+        self.next = {}
+
+
+DEAD_LEAF = Node(0, None, None, None, None, 0)
+LIVE_LEAF = Node(0, None, None, None, None, 1)
+
+
+class HashLife:
+    def __init__(self, max_nodes: int = 1 << 20):
+        self.max_nodes = max_nodes
+        # 자식 노드 4개의 튜플을 키로 사용한다.
+        # 키가 자식 노드를 직접 참조하므로 `id` 가 재사용되는 문제가 없다.
+        self.table = {}
+        self.empties = [DEAD_LEAF]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0 # 버린 노드 수
+        self.collections = 0 # 테이블을 비운 횟수
+
+    def node(self, nw, ne, sw, se) -> Node:
+        key = (nw, ne, sw, se)
+        found = self.table.get(key)
+        if found is not None:
+            self.hits += 1
+            return found
+        self.misses += 1
+        population = (
+            nw.population + ne.population
+            + sw.population + se.population
+        )
+        found = Node(nw.level + 1, nw, ne, sw, se, population)
+        self.table[key] = found
+        return found
+
+    def clear(self):
+        """ 정규화 테이블과 모든 메모이제이션 결과를 버립니다. 이후에 만드는 노드는 이전 노드와 공유되지 않는다.
+        """
+        for node in self.table.values():
+            node.next.clear()
+        self.evictions += len(self.table)
+        self.table = {}
+        self.empties = [DEAD_LEAF]
+
+    def collect(self):
+        """ 테이블이 `max_nodes` 를 넘었으면 모두 버립니다. 계산 중이 아닐 때(`advance` 사이)에만 호출한다.
+        """
+        if len(self.table) > self.max_nodes:
+            self.clear()
+            self.collections += 1
+
+    def empty(self, level) -> Node:
+        # 빈 노드는 자주 쓰이므로 정규화 테이블과 별개로 들고 있는다.
+        while len(self.empties) <= level:
+            child = self.empties[-1]
+            self.empties.append(self.node(child, child, child, child))
+        return self.empties[level]
+
+    def centered_horizontal(self, w: Node, e: Node) -> Node:
+        return self.node(w.ne, e.nw, w.se, e.sw)
+
+    def centered_vertical(self, n: Node, s: Node) -> Node:
+        return self.node(n.sw, n.se, s.nw, s.ne)
+
+    def centered(self, node: Node) -> Node:
+        return self.node(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def base_step(self, node: Node) -> Node:
+        """ 4x4 노드의 가운데 2x2 영역을 한 세대 진행합니다.
+        """
+        cells = [[0] * 4 for _ in range(4)]
+        for qy, qx, quad in ((0, 0, node.nw), (0, 2, node.ne),
+                             (2, 0, node.sw), (2, 2, node.se)):
+            cells[qy][qx] = quad.nw.population
+            cells[qy][qx + 1] = quad.ne.population
+            cells[qy + 1][qx] = quad.sw.population
+            cells[qy + 1][qx + 1] = quad.se.population
+
+        leaves = []
+        for y in (1, 2):
+            for x in (1, 2):
+                neighbors = (
+                    sum(cells[y - 1][x - 1:x + 2])
+                    + cells[y][x - 1] + cells[y][x + 1]
+                    + sum(cells[y + 1][x - 1:x + 2])
+                )
+                state = ALIVE if cells[y][x] else EMPTY
+                next_state = game_logic(state, neighbors, io_blocking_time=0)
+                leaves.append(LIVE_LEAF if next_state == ALIVE else DEAD_LEAF)
+        return self.node(*leaves)
+
+    def successor(self, node: Node, j: int) -> Node:
+        """ `node` (level k >= 2) 의 가운데 영역(level k-1)을 2^j 세대 진행한 결과입니다.
+        j 는 k-2 를 넘을 수 없다.
+        """
+        k = node.level
+        assert 0 <= j <= k - 2
+        if node.population == 0:
+            return self.empty(k - 1)
+        found = node.next.get(j)
+        if found is not None:
+            return found
+
+        if k == 2:
+            result = self.base_step(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            parts = [
+                nw,
+                self.centered_horizontal(nw, ne),
+                ne,
+                self.centered_vertical(nw, sw),
+                self.centered(node),
+                self.centered_vertical(ne, se),
+                sw,
+                self.centered_horizontal(sw, se),
+                se,
+            ]
+            if j == k - 2:
+                # 최대 속도: 2^(k-3) 세대씩 두 번 진행한다.
+                parts = [self.successor(part, j - 1) for part in parts]
+                inner = j - 1
+            else:
+                # 그보다 느리게 진행할 때는 첫 번째 단계에서 시간을 진행하지 않는다.
+                parts = [self.centered(part) for part in parts]
+                inner = j
+            c00, c01, c02, c10, c11, c12, c20, c21, c22 = parts
+            result = self.node(
+                self.successor(self.node(c00, c01, c10, c11), inner),
+                self.successor(self.node(c01, c02, c11, c12), inner),
+                self.successor(self.node(c10, c11, c20, c21), inner),
+                self.successor(self.node(c11, c12, c21, c22), inner),
+            )
+
+        node.next[j] = result
+        return result
+
+    def tile(self, rows, level: int, y0: int, x0: int) -> Node:
+        """ `rows` 를 토러스처럼 반복해서 깔았을 때, (y0, x0) 에서 시작하는
+        한 변이 2^level 인 정사각형 영역을 노드로 만듭니다.
+        """
+        h, w = len(rows), len(rows[0])
+        memo = {}
+
+        def build(level, y, x):
+            key = (level, y % h, x % w)
+            found = memo.get(key)
+            if found is not None:
+                return found
+            if level == 0:
+                found = LIVE_LEAF if rows[y % h][x % w] else DEAD_LEAF
+            else:
+                half = 1 << (level - 1)
+                found = self.node(
+                    build(level - 1, y, x),
+                    build(level - 1, y, x + half),
+                    build(level - 1, y + half, x),
+                    build(level - 1, y + half, x + half),
+                )
+            memo[key] = found
+            return found
+
+        return build(level, y0, x0)
+
+    def live_cells(self, node: Node, height: int, width: int):
+        """ (0, 0) 에 놓인 `node` 에서 `height` x `width` 영역 안의 살아 있는 셀 좌표를 찾습니다.
+        """
+        stack = [(node, 0, 0)]
+        while stack:
+            node, y, x = stack.pop()
+            if node.population == 0 or y >= height or x >= width:
+                continue
+            if node.level == 0:
+                yield y, x
+                continue
+            half = 1 << (node.level - 1)
+            stack.append((node.nw, y, x))
+            stack.append((node.ne, y, x + half))
+            stack.append((node.sw, y + half, x))
+            stack.append((node.se, y + half, x + half))
+
+    def advance(self, rows, j: int):
+        """ 토러스 `rows` 를 2^j 세대 진행합니다.
+        """
+        self.collect()
+        h, w = len(rows), len(rows[0])
+        # 결과(한 변 2^(k-1))가 그리드를 모두 덮어야 하고, j <= k-2 여야 한다.
+        k = max(j + 2, (max(h, w) - 1).bit_length() + 1, 2)
+        margin = 1 << (k - 2)
+        root = self.tile(rows, k, -margin, -margin)
+        result = self.successor(root, j)
+
+        next_rows = [[0] * w for _ in range(h)]
+        for y, x in self.live_cells(result, h, w):
+            next_rows[y][x] = 1
+        return next_rows
+
+
+def simulate_hashlife(
+    grid: Grid,
+    generations: int,
+    engine: HashLife = None,
+) -> Grid:
+    if engine is None:
+        engine = HashLife()
+    h, w = grid.height, grid.width
+    rows = [
+        [1 if grid.get(y, x) == ALIVE else 0 for x in range(w)]
+        for y in range(h)
+    ]
+
+    # 세대 수를 2의 거듭제곱들의 합으로 쪼개서 진행한다.
+    j = 0
+    while generations:
+        if generations & 1:
+            rows = engine.advance(rows, j)
+        generations >>= 1
+        j += 1
+
+    next_grid = Grid(width=w, height=h, storage=type(grid.storage))
+    for y in range(h):
+        for x in range(w):
+            if rows[y][x]:
+                next_grid.set(y, x, ALIVE)
+    return next_grid
+
+
+if __name__ == '__main__':
+    grid = Grid(width=5, height=5)
+    grid.set(0, 3, ALIVE)
+    grid.set(1, 4, ALIVE)
+    grid.set(2, 2, ALIVE)
+    grid.set(2, 3, ALIVE)
+    grid.set(2, 4, ALIVE)
+
+    colorprint('`simulate` 와 `simulate_hashlife` 의 결과 비교')
+    expected = grid
+    for i in range(1, 6):
+        expected = simulate(expected)
+        assert str(expected) == str(simulate_hashlife(grid, i))
+    print(expected)
+    print('1~5세대 모두 결과가 같습니다.')
+
+    colorprint('64 x 64 그리드 위 글라이더 4개, 10^6 세대')
+    grid = Grid(width=64, height=64, storage=ListStorage)
+    for oy, ox in ((0, 0), (0, 32), (32, 0), (32, 32)):
+        for y, x in ((0, 1), (1, 2), (2, 0), (2, 1), (2, 2)):
+            grid.set(oy + y, ox + x, ALIVE)
+    engine = HashLife(max_nodes=1 << 16)
+    s = time.time()
+    result = simulate_hashlife(grid, 10 ** 6, engine=engine)
+    e = time.time()
+    print(result)
+    print(f'{e-s:.2f}초 소요됨. '
+          f'노드 캐시: 적중 {engine.hits}회, 실패 {engine.misses}회, '
+          f'비움 {engine.collections}회')
+
+    colorprint('\n노드 캐시 크기에 따른 소요 시간 비교 (1000 세대)')
+    boards = {
+        '5 x 5 글라이더': (5, 5, ((0, 3), (1, 4), (2, 2), (2, 3), (2, 4))),
+        '9 x 13 R-펜토미노': (9, 13, ((3, 6), (3, 7), (4, 5), (4, 6), (5, 6))),
+    }
+    for name, (h, w, cells) in boards.items():
+        grid = Grid(width=w, height=h)
+        for y, x in cells:
+            grid.set(y, x, ALIVE)
+        results = []
+        for max_nodes in [1 << 30, 1024, 128]:
+            engine = HashLife(max_nodes=max_nodes)
+            s = time.time()
+            results.append(str(simulate_hashlife(grid, 1000, engine=engine)))
+            e = time.time()
+            print(f'{name}, max_nodes={max_nodes:>10}: {e-s:.3f}초, '
+                  f'실패 {engine.misses}회, 비움 {engine.collections}회')
+        assert len(set(results)) == 1
+
@@ -11,9 +11,10 @@
 """
 
 import time
+import typing
 from threading import Thread, Lock
 
-from better_way_56 import step_cell, Grid, ALIVE
+from better_way_56 import step_cell, Grid, ListStorage, ALIVE
 from utils import colorprint
 
 
@@ -24,9 +25,10 @@ class LockingGrid(Grid):
     def __init__(
         self, /, *,
         width: int = 0,
-        height: int = 0
+        height: int = 0,
+        storage: typing.Callable = ListStorage,
     ):
-        super().__init__(width=width, height=height)
+        super().__init__(width=width, height=height, storage=storage)
         self.lock = Lock()
 
     def get(self, y, x):
@@ -44,7 +46,7 @@ class LockingGrid(Grid):
 
 def simulate_threaded(grid: LockingGrid):
     h, w = grid.height, grid.width
-    next_grid = LockingGrid(width=w, height=h)
+    next_grid = LockingGrid(width=w, height=h, storage=type(grid.storage))
 
     threads = []
     for y in range(h):
@@ -0,0 +1,186 @@
+""" better way 57 의 `LockingGrid` 는 `get`, `set` 을 호출할 때마다 하나뿐인 락을 잡는다.
+그런데 `simulate_threaded` 나 `simulate_pool` (better_way_59) 에서
+이전 세대의 그리드는 읽기만 하고, 다음 세대의 그리드의 각 셀은 정확히 한 번만 쓰인다.
+읽기만 하는 데이터와, 서로 겹치지 않는 위치에 한 번씩만 쓰는 데이터에는 락이 필요 없다.
+1. `DoubleBufferedGrid` 는 읽기용 버퍼(`storage`)와 쓰기용 버퍼(`back`)를 함께 가진다.
+   한 세대를 계산하는 동안 읽기용 버퍼는 바뀌지 않는다.
+2. 쓰기용 버퍼는 행 단위로 나누어 작업자(`BandWriter`)마다 겹치지 않게 나누어 준다.
+3. 한 세대가 끝나면 두 버퍼의 참조만 맞바꾼다(`swap`). 그리드를 새로 만들거나 복사하지 않는다.
+   작업자 중 하나라도 실패하면 쓰기용 버퍼에 쓰이지 않은 셀이 남는다. 그 셀에는 두 세대 전의 값이 들어 있으므로
+   버퍼를 바꾸지 않고 `SimulationError` (better_way_58) 를 일으킨다.
+주의: `BitPackedStorage` (better_way_56_1) 는 한 바이트에 같은 행의 셀 8개를 담는다.
+`|=` 연산은 원자적이지 않으므로, 이 저장소는 같은 행을 여러 스레드가 나누어 쓰면 안 된다.
+행 단위로 나누어 쓰는 것은 괜찮다. 행마다 바이트가 따로 시작하기 때문이다.
+"""
+
+import time
+import typing
+from threading import Thread
+
+from better_way_56 import step_cell, Grid, ListStorage, ALIVE, EMPTY
+from better_way_56_1 import BitPackedStorage
+from better_way_57 import LockingGrid, simulate_threaded
+from better_way_58 import SimulationError
+from utils import colorprint
+
+
+class BandWriter:
+    """ 쓰기용 버퍼에서 [y0, y1) 행만 쓸 수 있는 작업자입니다.
+    """
+    def __init__(self, grid: 'DoubleBufferedGrid', y0: int, y1: int):
+        self.grid = grid
+        self.y0 = y0
+        self.y1 = y1
+
+    def set(self, y, x, state):
+        grid = self.grid
+        y %= grid.height
+        assert self.y0 <= y < self.y1, f'{y} 행은 [{self.y0}, {self.y1}) 작업자의 소유가 아닙니다.'
+        assert state in [ALIVE, EMPTY]
+        grid.back.set(y, x % grid.width, state)
+
+
+class DoubleBufferedGrid(Grid):
+    """ `get`, `set`, `__str__` 은 읽기용 버퍼를 대상으로 한다.
+    다음 세대의 값은 `set_next` 나 `partition` 으로 얻은 `BandWriter` 로 쓴다.
+    """
+    def __init__(
+        self, /, *,
+        width: int = 0,
+        height: int = 0,
+        storage: typing.Callable = ListStorage,
+    ):
+        super().__init__(width=width, height=height, storage=storage)
+        self.back = storage(height, width)
+        # 같은 행의 셀들이 메모리를 나누어 쓰는 저장소인지 여부
+        self.packed = isinstance(self.storage, BitPackedStorage)
+
+    def set_next(self, y, x, state):
+        assert state in [ALIVE, EMPTY]
+        self.back.set(y % self.height, x % self.width, state)
+
+    def partition(self, n_owner: int) -> list[BandWriter]:
+        n_owner = max(1, min(n_owner, self.height))
+        bounds = [self.height * i // n_owner for i in range(n_owner + 1)]
+        return [
+            BandWriter(self, y0, y1)
+            for y0, y1 in zip(bounds[:-1], bounds[1:])
+        ]
+
+    def swap(self):
+        # 모든 셀이 한 번씩 쓰였으므로 쓰기용 버퍼를 비울 필요 없이 참조만 바꾼다.
+        self.storage, self.back = self.back, self.storage
+
+
+def step_band(grid: DoubleBufferedGrid, writer: BandWriter) -> None:
+    for y in range(writer.y0, writer.y1):
+        for x in range(grid.width):
+            step_cell(y, x, grid.get, writer.set)
+
+
+def record_errors(errors: list, where: tuple, target, *args) -> None:
+    """ `Thread` 는 `target` 에서 발생한 예외를 삼키므로, 예외를 `errors` 에 모아 둡니다.
+    """
+    try:
+        target(*args)
+    except Exception as e:
+        errors.append((where, e))
+
+
+def simulate_threaded_buffered(
+    grid: DoubleBufferedGrid,
+    n_thread: int = None,
+) -> DoubleBufferedGrid:
+    """ `n_thread` 가 `None` 이면 `simulate_threaded` 처럼 셀마다 스레드를 하나씩 만들고,
+    정수이면 행을 `n_thread` 개의 띠로 나누어 띠마다 스레드를 하나씩 만듭니다.
+    """
+    h, w = grid.height, grid.width
+
+    threads = []
+    errors = [] # (실패한 셀 또는 행의 범위, 예외)
+    if n_thread is None:
+        assert not grid.packed, '비트 패킹 저장소는 행 단위로만 나누어 쓸 수 있습니다.'
+        for y in range(h):
+            for x in range(w):
+                args = (errors, (y, x), step_cell, y, x, grid.get, grid.set_next)
+                thread = Thread(target=record_errors, args=args)
+                thread.start()
+                threads.append(thread)
+    else:
+        for writer in grid.partition(n_thread):
+            args = (errors, (writer.y0, writer.y1), step_band, grid, writer)
+            thread = Thread(target=record_errors, args=args)
+            thread.start()
+            threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        # 쓰기용 버퍼가 다 채워지지 않았으므로 바꾸지 않는다. 읽기용 버퍼는 이전 세대 그대로다.
+        where, error = errors[0]
+        raise SimulationError(*where) from error
+
+    grid.swap()
+    return grid
+
+
+def glider(grid_type, width, height):
+    grid = grid_type(width=width, height=height)
+    grid.set(0, 3, ALIVE)
+    grid.set(1, 4, ALIVE)
+    grid.set(2, 2, ALIVE)
+    grid.set(2, 3, ALIVE)
+    grid.set(2, 4, ALIVE)
+    return grid
+
+
+if __name__ == '__main__':
+    grid = glider(DoubleBufferedGrid, 10, 10)
+
+    colorprint('게임 시작')
+    s = time.time()
+    print(grid)
+
+    for i in range(5):
+        grid = simulate_threaded_buffered(grid)
+        print('..')
+        print(grid)
+
+    e = time.time()
+    colorprint(f'게임 끝, {e-s:.2f}초 소요됨.')
+
+    colorprint('`LockingGrid` 와 `DoubleBufferedGrid` 의 결과 비교 (10세대)')
+    locking = glider(LockingGrid, 10, 10)
+    buffered = glider(DoubleBufferedGrid, 10, 10)
+    s = time.time()
+    for i in range(10):
+        locking = simulate_threaded(locking)
+    e = time.time()
+    print(f'`LockingGrid`, 셀마다 스레드: {e-s:.2f}초')
+
+    s = time.time()
+    for i in range(10):
+        buffered = simulate_threaded_buffered(buffered)
+    e = time.time()
+    print(f'`DoubleBufferedGrid`, 셀마다 스레드: {e-s:.2f}초')
+    assert str(locking) == str(buffered)
+    print('결과가 같습니다.')
+
+    colorprint('작업자가 실패하면 버퍼를 바꾸지 않음')
+
+    class FailingGrid(DoubleBufferedGrid):
+        def get(self, y, x):
+            if (y, x) == (7, 7):
+                raise IOError('읽기 실패')
+            return super().get(y, x)
+
+    failing = glider(FailingGrid, 10, 10)
+    before = str(failing)
+    for n_thread in [None, 2]:
+        try:
+            simulate_threaded_buffered(failing, n_thread=n_thread)
+        except SimulationError as e:
+            print(f'{e!r} 발생, 원인: {e.__cause__!r}')
+        assert str(failing) == before
+    print('그리드는 이전 세대 그대로입니다.')
@@ -59,7 +59,7 @@ def simulate_pipeline(
     # 뒤에 더이상 다른 원소가 오지 않을 것이라고 확신할 수 있다.
     out_queue.close()
 
-    next_grid = Grid(height=h, width=w)
+    next_grid = Grid(height=h, width=w, storage=type(grid.storage))
     for item in out_queue:
         y, x, next_state = item
         if isinstance(next_state, Exception):
@@ -9,22 +9,84 @@
 2. 스레드가 필요한 시점에 만들고 실행하는 것이 아니라, 미리 만들어 두고 꺼내 써 오버헤드가 없다.
 3. 스레드에서 발생한 예외를 `future.result` 메서드 호출 시 함께 전파한다.
 4. 구현이 복잡하지 않아 싱글스레드 구현을 재사용하기 용이하다.
+다만 셀 하나마다 `Future` 를 하나씩 만들면, 1000 x 1000 그리드에서는 `Future` 가 100만 개 만들어지고
+`LockingGrid` 의 락도 셀마다 잡았다 놓는다. `chunksize` 를 지정하면 작업 하나가 여러 행을 한꺼번에 처리하고
+결과를 모아서 돌려준다. 락은 작업 하나당 읽기 한 번, 쓰기 한 번만 잡는다.
+`DoubleBufferedGrid` (better_way_57_1) 를 사용하는 `simulate_pool_buffered` 는 락을 아예 잡지 않는다.
 """
 
+import time
+from functools import partial
 from concurrent.futures import ThreadPoolExecutor
 
-from better_way_56 import step_cell, ALIVE
+import better_way_56
+from better_way_56 import step_cell, Grid, ALIVE
 from better_way_57 import LockingGrid
+from better_way_57_1 import DoubleBufferedGrid, step_band
 
 from utils import colorprint
 
 
+def step_rows(
+    grid: LockingGrid,
+    y0: int,
+    y1: int,
+) -> list[tuple]:
+    """ [y0, y1) 행의 셀들을 한 세대 진행하고, 그 결과를 (y, x, state) 의 리스트로 돌려줍니다.
+    """
+    w = grid.width
+    # 계산에 필요한 행과 위아래 한 줄씩을 락을 한 번만 잡고 복사해 둔다.
+    # 이전 세대의 그리드는 이번 세대를 계산하는 동안 바뀌지 않으므로 복사본을 읽어도 안전하다.
+    with grid.lock:
+        rows = {
+            y: [Grid.get(grid, y, x) for x in range(w)]
+            for y in range(y0 - 1, y1 + 1)
+        }
+
+    def get(y, x):
+        return rows[y][x % w]
+
+    results = []
+
+    def set(y, x, state):
+        results.append((y, x, state))
+
+    # 싱글스레드 구현인 `step_cell` 을 그대로 재사용한다.
+    for y in range(y0, y1):
+        for x in range(w):
+            step_cell(y, x, get, set)
+    return results
+
+
+def check_chunksize(chunksize) -> None:
+    if chunksize is not None and chunksize < 1:
+        raise ValueError(f'`chunksize` 는 1 이상이어야 합니다. ({chunksize})')
+
+
 def simulate_pool(
     pool: ThreadPoolExecutor,
-    grid: LockingGrid
+    grid: LockingGrid,
+    chunksize: int = None,
 ):
+    """ `chunksize` 가 `None` 이면 셀 하나를 작업 하나로 제출하고,
+    정수이면 `chunksize` 개의 행을 작업 하나로 묶어서 제출합니다.
+    """
+    check_chunksize(chunksize)
     h, w = grid.height, grid.width
-    next_grid = LockingGrid(width=w, height=h)
+    next_grid = LockingGrid(width=w, height=h, storage=type(grid.storage))
+
+    if chunksize is not None:
+        futures = []
+        for y0 in range(0, h, chunksize):
+            y1 = min(y0 + chunksize, h)
+            futures.append(pool.submit(step_rows, grid, y0, y1))
+
+        for future in futures:
+            results = future.result()
+            with next_grid.lock:
+                for y, x, state in results:
+                    Grid.set(next_grid, y, x, state)
+        return next_grid
 
     futures = []
     for y in range(h):
@@ -45,6 +107,79 @@ def simulate_pool(
     return next_grid
 
 
+def simulate_pool_buffered(
+    pool: ThreadPoolExecutor,
+    grid: DoubleBufferedGrid,
+    chunksize: int = None,
+):
+    """ `simulate_pool` 과 같지만, 읽기용 버퍼에서 읽고 쓰기용 버퍼에 쓰므로 락이 필요 없습니다.
+    `chunksize` 가 정수이면 `chunksize` 개의 행을 소유한 `BandWriter` 하나가 작업 하나가 된다.
+    """
+    check_chunksize(chunksize)
+    h, w = grid.height, grid.width
+
+    futures = []
+    if chunksize is None:
+        assert not grid.packed, '비트 패킹 저장소는 행 단위로만 나누어 쓸 수 있습니다.'
+        for y in range(h):
+            for x in range(w):
+                args = (y, x, grid.get, grid.set_next)
+                futures.append(pool.submit(step_cell, *args))
+    else:
+        n_owner = (h + chunksize - 1) // chunksize
+        for writer in grid.partition(n_owner):
+            futures.append(pool.submit(step_band, grid, writer))
+
+    for future in futures:
+        future.result()
+
+    grid.swap()
+    return grid
+
+
+def benchmark(
+    sizes=(50, 100, 200),
+    chunksizes=(None, 1, 8, 32),
+    max_workers: int = 10,
+):
+    """ 셀 단위 제출과 행 단위 제출의 소요 시간을 그리드 크기별로 비교합니다.
+    작업을 주고받는 비용만 비교하기 위해 `game_logic` 의 I/O 블로킹은 끈다.
+    """
+    # `step_cell` 은 `better_way_56` 모듈의 `game_logic` 을 부르므로 모듈의 함수를 잠시 바꿔 둔다.
+    original = better_way_56.game_logic
+    better_way_56.game_logic = partial(original, io_blocking_time=0)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for size in sizes:
+                grid = LockingGrid(width=size, height=size)
+                grid.set(0, 3, ALIVE)
+                grid.set(1, 4, ALIVE)
+                grid.set(2, 2, ALIVE)
+                grid.set(2, 3, ALIVE)
+                grid.set(2, 4, ALIVE)
+                for chunksize in chunksizes:
+                    s = time.perf_counter()
+                    simulate_pool(pool, grid, chunksize=chunksize)
+                    e = time.perf_counter()
+                    mode = '셀 단위' if chunksize is None else f'{chunksize}행 단위'
+                    print(f'{size:>4} x {size:<4} {mode:>8}: {e-s:.4f}초')
+
+                for chunksize in chunksizes:
+                    # `simulate_pool_buffered` 는 그리드를 그 자리에서 다음 세대로 바꾸므로
+                    # 모든 방식이 같은 세대를 계산하도록 매번 새로 만든다.
+                    buffered = DoubleBufferedGrid(width=size, height=size)
+                    for y in range(size):
+                        for x in range(size):
+                            buffered.set(y, x, grid.get(y, x))
+                    s = time.perf_counter()
+                    simulate_pool_buffered(pool, buffered, chunksize=chunksize)
+                    e = time.perf_counter()
+                    mode = '셀 단위' if chunksize is None else f'{chunksize}행 단위'
+                    print(f'{size:>4} x {size:<4} {mode:>8}: {e-s:.4f}초 (락 없음)')
+    finally:
+        better_way_56.game_logic = original
+
+
 if __name__ == '__main__':
     grid = LockingGrid(width=10, height=5)
     grid.set(0, 3, ALIVE)
@@ -60,3 +195,20 @@ if __name__ == '__main__':
             grid = simulate_pool(pool, grid)
             print('..')
             print(grid)
+
+    colorprint('같은 게임을 2행 단위로 제출')
+    grid = LockingGrid(width=10, height=5)
+    grid.set(0, 3, ALIVE)
+    grid.set(1, 4, ALIVE)
+    grid.set(2, 2, ALIVE)
+    grid.set(2, 3, ALIVE)
+    grid.set(2, 4, ALIVE)
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        for i in range(5):
+            grid = simulate_pool(pool, grid, chunksize=2)
+            print('..')
+            print(grid)
+
+    colorprint('제출 방식에 따른 소요 시간 비교')
+    benchmark()
@@ -0,0 +1,129 @@
+""" better way 59 의 `simulate_pool` 은 `ThreadPoolExecutor` 를 사용한다.
+`game_logic` 처럼 I/O 블로킹이 대부분인 작업에는 잘 맞지만,
+셀 상태를 계산하는 일 자체가 무거운(CPU 바운드) 경우에는 GIL 때문에 한 번에 한 스레드만 일을 한다.
+게다가 셀마다 `LockingGrid` 의 락을 잡고 놓는다.
+`ProcessPoolExecutor` 를 사용하면 프로세스마다 별도의 인터프리터(와 GIL)가 있으므로 코어를 모두 사용할 수 있다.
+1. 그리드를 가로 띠(band) 여러 개로 나누고, 띠 하나를 작업 하나로 제출한다.
+   셀 하나를 작업 하나로 제출하면 작업을 주고받는 비용이 계산 비용보다 훨씬 커진다.
+2. 띠의 위아래 경계에 있는 셀을 계산하려면 이웃한 띠의 한 줄(halo)이 필요하다.
+3. 그리드를 작업마다 피클링해서 보내는 대신 `multiprocessing.shared_memory` 에 한 번만 올려 두고,
+   작업자 프로세스는 공유 메모리의 이름만 받아서 읽고 쓴다. 결과를 이어붙이는 일도 공유 메모리 위에서 끝난다.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from better_way_56 import Grid, ALIVE
+from better_way_56_1 import NumpyStorage, grid_to_array, array_to_grid
+from better_way_56_2 import step_array
+from utils import colorprint
+
+
+def step_band(
+    in_name: str,
+    out_name: str,
+    shape: tuple,
+    y0: int,
+    y1: int,
+) -> None:
+    """ 작업자 프로세스에서 실행됩니다.
+    공유 메모리에 있는 그리드의 [y0, y1) 행을 한 세대 진행해서 결과 공유 메모리에 씁니다.
+    """
+    in_shm = shared_memory.SharedMemory(name=in_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    try:
+        cells = np.ndarray(shape, dtype=np.uint8, buffer=in_shm.buf)
+        next_cells = np.ndarray(shape, dtype=np.uint8, buffer=out_shm.buf)
+        # 위아래로 한 줄씩 halo 를 붙인다. 토러스이므로 인덱스는 감싸서(wrap) 가져온다.
+        rows = np.arange(y0 - 1, y1 + 1)
+        band = np.take(cells, rows, axis=0, mode='wrap')
+        # halo 행의 결과는 이웃이 모자라서 틀리므로 버린다.
+        next_cells[y0:y1] = step_array(band)[1:-1]
+        del cells, next_cells
+    finally:
+        in_shm.close()
+        out_shm.close()
+
+
+def split_rows(height: int, n_band: int) -> list[tuple[int, int]]:
+    n_band = max(1, min(n_band, height))
+    bounds = [height * i // n_band for i in range(n_band + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def simulate_multiprocess(
+    grid: Grid,
+    workers: int = None,
+    pool: ProcessPoolExecutor = None,
+) -> Grid:
+    """ `pool` 을 넘기지 않으면 `workers` 개의 프로세스로 이루어진 풀을 만들어 사용합니다.
+    여러 세대를 진행할 때는 풀을 만들어 넘기는 편이 프로세스 생성 비용을 아낄 수 있다.
+    """
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return simulate_multiprocess(grid, workers=workers, pool=pool)
+
+    workers = workers or os.cpu_count()
+    shape = (grid.height, grid.width)
+    cells = grid_to_array(grid)
+    in_shm = shared_memory.SharedMemory(create=True, size=cells.nbytes)
+    out_shm = shared_memory.SharedMemory(create=True, size=cells.nbytes)
+    try:
+        shared = np.ndarray(shape, dtype=np.uint8, buffer=in_shm.buf)
+        shared[...] = cells
+
+        futures = []
+        for y0, y1 in split_rows(grid.height, workers):
+            future = pool.submit(
+                step_band, in_shm.name, out_shm.name, shape, y0, y1)
+            futures.append(future)
+        for future in futures:
+            # 작업자 프로세스에서 발생한 예외도 여기서 다시 발생한다.
+            future.result()
+
+        next_cells = np.ndarray(shape, dtype=np.uint8, buffer=out_shm.buf)
+        next_grid = array_to_grid(next_cells, storage=type(grid.storage))
+        del shared, next_cells
+    finally:
+        in_shm.close()
+        in_shm.unlink()
+        out_shm.close()
+        out_shm.unlink()
+    return next_grid
+
+
+if __name__ == '__main__':
+    grid = Grid(width=10, height=5)
+    grid.set(0, 3, ALIVE)
+    grid.set(1, 4, ALIVE)
+    grid.set(2, 2, ALIVE)
+    grid.set(2, 3, ALIVE)
+    grid.set(2, 4, ALIVE)
+
+    colorprint('게임 시작')
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        for i in range(5):
+            grid = simulate_multiprocess(grid, workers=2, pool=pool)
+            print('..')
+            print(grid)
+
+    size = 4000
+    colorprint(f'작업자 수에 따른 소요 시간 ({size} x {size}, 10세대, CPU {os.cpu_count()}개)')
+    rng = np.random.default_rng(59)
+    big = array_to_grid(
+        rng.integers(0, 2, (size, size), dtype=np.uint8),
+        storage=NumpyStorage,
+    )
+    for workers in (1, 2, 4, 8):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # 프로세스를 미리 띄워 두기 위해 한 번 실행한다.
+            simulate_multiprocess(big, workers=workers, pool=pool)
+            s = time.perf_counter()
+            for _ in range(10):
+                simulate_multiprocess(big, workers=workers, pool=pool)
+            e = time.perf_counter()
+        print(f'작업자 {workers}개: {e-s:.3f}초')
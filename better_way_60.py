@@ -71,7 +71,7 @@ async def step_cell(
 
 async def simulate(grid: Grid) -> Grid:
     h, w = grid.height, grid.width
-    next_grid = Grid(width=w, height=h)
+    next_grid = Grid(width=w, height=h, storage=type(grid.storage))
 
     tasks = []
     for y in range(h):
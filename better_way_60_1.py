@@ -0,0 +1,100 @@
+""" better way 60 의 `simulate` 는 셀마다 코루틴을 하나씩 만들어 한꺼번에 `asyncio.gather` 에 넘긴다.
+`gather` 는 코루틴마다 태스크를 만들기 때문에, 한 세대에 `width * height` 개의 태스크가 동시에 살아 있다.
+그리드가 커지면 메모리 사용량도 그만큼 커진다.
+이벤트 루프에 스레드 개수 같은 제한은 없지만, 동시에 진행 중인 작업의 수는 직접 제한할 수 있다.
+1. 그리드의 셀들을 행 우선 순서로 `tile_size` 개씩 묶어 타일로 나눈다. 코루틴 하나가 타일 하나를 처리한다.
+2. 정해진 수(`concurrency`)의 작업자 태스크만 만들고, 작업자들은 타일을 하나씩 꺼내 처리한다.
+   한 번에 살아 있는 셀 코루틴의 수는 `concurrency * 타일 크기` 를 넘지 않는다.
+3. 타일의 결과는 `step_cell` 이 곧바로 `next_grid` 에 써 넣는다. 결과를 모아 두었다가 한꺼번에 쓰지 않는다.
+"""
+
+import time
+import asyncio
+import tracemalloc
+
+from utils import colorprint
+
+from better_way_56 import Grid, ALIVE
+from better_way_60 import step_cell, simulate
+
+
+async def step_tile(grid: Grid, next_grid: Grid, i0: int, i1: int) -> None:
+    """ 행 우선 순서로 [i0, i1) 번째 셀들을 한 세대 진행합니다.
+    """
+    w = grid.width
+    await asyncio.gather(*(
+        step_cell(*divmod(i, w), grid.get, next_grid.set)
+        for i in range(i0, i1)
+    ))
+
+
+async def simulate_bounded(
+    grid: Grid,
+    concurrency: int = 10,
+    tile_size: int = 64,
+) -> Grid:
+    h, w = grid.height, grid.width
+    n_cell = h * w
+    next_grid = Grid(width=w, height=h, storage=type(grid.storage))
+
+    # 타일 목록을 미리 만들지 않고 제너레이터에서 하나씩 꺼낸다.
+    # 이벤트 루프는 단일 스레드에서 돌기 때문에 여러 작업자가 같은 제너레이터를 나누어 써도 안전하다.
+    tiles = (
+        (i0, min(i0 + tile_size, n_cell))
+        for i0 in range(0, n_cell, tile_size)
+    )
+
+    async def worker():
+        for i0, i1 in tiles:
+            await step_tile(grid, next_grid, i0, i1)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return next_grid
+
+
+def glider(width, height):
+    grid = Grid(width=width, height=height)
+    grid.set(0, 3, ALIVE)
+    grid.set(1, 4, ALIVE)
+    grid.set(2, 2, ALIVE)
+    grid.set(2, 3, ALIVE)
+    grid.set(2, 4, ALIVE)
+    return grid
+
+
+def measure(coroutine):
+    """ 코루틴을 실행하고 (결과, 소요 시간, 최대 메모리 사용량) 을 반환합니다.
+    """
+    tracemalloc.start()
+    s = time.time()
+    result = asyncio.run(coroutine)
+    e = time.time()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, e - s, peak
+
+
+if __name__ == '__main__':
+    grid = glider(5, 5)
+
+    colorprint('게임 시작')
+    s = time.time()
+    print(grid)
+
+    for i in range(5):
+        grid = asyncio.run(simulate_bounded(grid, concurrency=2))
+        print('..')
+        print(grid)
+
+    e = time.time()
+    colorprint(f'게임 끝, {e-s:.2f}초 소요됨.')
+
+    colorprint('그리드 크기에 따른 최대 메모리 사용량')
+    for size in (50, 100, 200):
+        grid = glider(size, size)
+        expected, t1, peak1 = measure(simulate(grid))
+        found, t2, peak2 = measure(simulate_bounded(grid, concurrency=10))
+        assert str(expected) == str(found)
+        print(f'{size:>4} x {size:<4} '
+              f'`simulate`: {peak1 / 2**20:6.2f}MiB ({t1:.2f}초), '
+              f'`simulate_bounded`: {peak2 / 2**20:6.2f}MiB ({t2:.2f}초)')